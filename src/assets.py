@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import posixpath
+
+from fileindex import build_file_index
+from manifest import file_hash
+
+
+fingerprint_extensions = (
+    ".css",
+    ".js",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".svg",
+    ".woff",
+    ".woff2",
+)
+fingerprint_length = 8
+asset_manifest_name = "asset-manifest.json"
+
+_asset_map = {}
+_version = ""
+
+
+def configure(asset_map=None):
+    global _asset_map, _version
+    _asset_map = asset_map or {}
+    _version = ""
+    if _asset_map:
+        text = json.dumps(sorted(_asset_map.items()))
+        _version = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def settings():
+    return (_asset_map,)
+
+
+def version():
+    return _version
+
+
+def asset_url(url):
+    if not _asset_map:
+        return url
+    path, sep, suffix = url.partition("?")
+    if not sep:
+        path, sep, suffix = url.partition("#")
+    fingerprinted = _asset_map.get(path)
+    if fingerprinted is None:
+        return url
+    return fingerprinted + sep + suffix
+
+
+def dependencies(urls):
+    found = {}
+    for url in urls:
+        if url.startswith("/") and not url.startswith("//"):
+            fingerprinted = asset_url(url)
+            if fingerprinted != url:
+                found[url] = fingerprinted
+    return found
+
+
+def fingerprinted_url(url, digest):
+    root, ext = posixpath.splitext(url)
+    return f"{root}.{digest[:fingerprint_length]}{ext}"
+
+
+def build_asset_map(dir_path_static, cache_path=None, transform=None):
+    digests = build_file_index(
+        dir_path_static, cache_path, file_hash, "fingerprint", fingerprint_extensions
+    )
+    if transform is not None:
+        for url in digests:
+            text = transform(os.path.join(dir_path_static, *url[1:].split("/")))
+            if text is not None:
+                digests[url] = text_digest(text)
+    return {url: fingerprinted_url(url, digest) for url, digest in digests.items()}
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,194 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from copystatic import copy_files_recursive, sync_static_files
+from corpus import CorpusConfig, generate_corpus
+from gencontent import find_pages, generate_page, generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from manifest import PageStore
+from markdown_blocks import (
+    BlockType,
+    block_to_block_type,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def stage_result(seconds, items, unit):
+    return {
+        "seconds": seconds,
+        "items": items,
+        "unit": unit,
+        "items_per_second": items / seconds if seconds > 0 else None,
+    }
+
+
+def run_benchmarks(dir_path, config, repeat=3, jobs=1):
+    dir_path_content, dir_path_static, template_path = generate_corpus(
+        dir_path, config
+    )
+    pages = find_pages(dir_path_content, os.path.join(dir_path, "out"))
+    documents = []
+    for from_path, _ in pages:
+        with open(from_path) as f:
+            documents.append(f.read())
+    blocks = [
+        block for document in documents for block in markdown_to_blocks(document)
+    ]
+    inline_texts = [
+        " ".join(block.split("\n"))
+        for block in blocks
+        if block_to_block_type(block) == BlockType.PARAGRAPH
+    ]
+    trees = [markdown_to_html_node(document) for document in documents]
+    markdown_bytes = sum(len(document.encode("utf-8")) for document in documents)
+
+    def run_generate_page():
+        for from_path, dest_path in pages:
+            generate_page(from_path, template_path, dest_path, "/")
+
+    def run_copy():
+        dest = os.path.join(dir_path, "copy")
+        shutil.rmtree(dest, ignore_errors=True)
+        copy_files_recursive(dir_path_static, dest)
+
+    def run_build():
+        dest = os.path.join(dir_path, "build")
+        shutil.rmtree(dest, ignore_errors=True)
+        sync_static_files(dir_path_static, dest)
+        generate_pages_recursive(
+            dir_path_content, template_path, dest, "/", PageStore(), jobs
+        )
+
+    stages = {}
+    stages["markdown_to_blocks"] = stage_result(
+        best_time(lambda: [markdown_to_blocks(d) for d in documents], repeat),
+        len(documents),
+        "pages",
+    )
+    stages["block_to_block_type"] = stage_result(
+        best_time(lambda: [block_to_block_type(b) for b in blocks], repeat),
+        len(blocks),
+        "blocks",
+    )
+    stages["text_to_textnodes"] = stage_result(
+        best_time(lambda: [text_to_textnodes(t) for t in inline_texts], repeat),
+        len(inline_texts),
+        "paragraphs",
+    )
+    stages["to_html"] = stage_result(
+        best_time(lambda: [tree.to_html() for tree in trees], repeat),
+        len(trees),
+        "pages",
+    )
+    stages["generate_page"] = stage_result(
+        best_time(run_generate_page, repeat), len(pages), "pages"
+    )
+    stages["copy_files_recursive"] = stage_result(
+        best_time(run_copy, repeat), config.images + 1, "files"
+    )
+    stages["build"] = stage_result(best_time(run_build, repeat), len(pages), "pages")
+
+    return {
+        "version": git_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "repeat": repeat,
+        "jobs": jobs,
+        "corpus": dict(config.to_dict(), markdown_bytes=markdown_bytes),
+        "stages": stages,
+    }
+
+
+def git_version():
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def main():
+    defaults = CorpusConfig()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=defaults.pages)
+    parser.add_argument("--blocks", type=int, default=defaults.blocks)
+    parser.add_argument("--words", type=int, default=defaults.words_per_block)
+    parser.add_argument("--link-density", type=float, default=defaults.link_density)
+    parser.add_argument("--image-density", type=float, default=defaults.image_density)
+    parser.add_argument("--emphasis-density", type=float, default=defaults.emphasis_density)
+    parser.add_argument("--list-ratio", type=float, default=defaults.list_ratio)
+    parser.add_argument("--code-ratio", type=float, default=defaults.code_ratio)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    args = parser.parse_args()
+
+    config = CorpusConfig(
+        pages=args.pages,
+        blocks=args.blocks,
+        words_per_block=args.words,
+        link_density=args.link_density,
+        image_density=args.image_density,
+        emphasis_density=args.emphasis_density,
+        list_ratio=args.list_ratio,
+        code_ratio=args.code_ratio,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory() as dir_path:
+        results = run_benchmarks(dir_path, config, args.repeat, args.jobs)
+
+    previous_stages = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous_stages = json.load(f)["stages"]
+    for name, stage in results["stages"].items():
+        line = (
+            f"{name:<22} {stage['seconds'] * 1000:10.2f} ms"
+            f"  {stage['items_per_second']:12.1f} {stage['unit']}/s"
+        )
+        if name in previous_stages:
+            change = stage["seconds"] / previous_stages[name]["seconds"] - 1
+            line += f"  {change:+7.1%}"
+        print(line, file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import sys
+import timeit
+
+from inline_markdown import text_to_textnodes, text_to_textnodes_reference
+
+
+def link_dense_text(count):
+    return " ".join(f"see [link {i}](https://example.com/{i}) here" for i in range(count))
+
+
+def emphasis_dense_text(count):
+    return " ".join(f"**bold {i}** and _italic_ with `code {i}`" for i in range(count))
+
+
+def mixed_text(count):
+    return " ".join(
+        f"**b{i}** [l{i}](/p/{i}) ![i{i}](/images/{i}.png) _e{i}_" for i in range(count)
+    )
+
+
+def bench(name, text, number):
+    if text_to_textnodes(text) != text_to_textnodes_reference(text):
+        raise ValueError(f"{name}: single-pass output differs from reference")
+    reference = min(
+        timeit.repeat(lambda: text_to_textnodes_reference(text), number=number, repeat=3)
+    )
+    single_pass = min(
+        timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=3)
+    )
+    print(
+        f"{name:<16} {len(text):>8} chars  reference {reference / number * 1000:8.3f} ms"
+        f"  single-pass {single_pass / number * 1000:8.3f} ms"
+        f"  speedup {reference / single_pass:5.1f}x"
+    )
+
+
+def main():
+    count = 1000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    bench("links", link_dense_text(count), 10)
+    bench("emphasis", emphasis_dense_text(count), 10)
+    bench("mixed", mixed_text(count), 10)
+
+
+if __name__ == "__main__":
+    main()
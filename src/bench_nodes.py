@@ -0,0 +1,80 @@
+import gc
+import sys
+import tracemalloc
+
+import htmlnode
+import inline_markdown
+import markdown_blocks
+import textnode
+
+
+def synthetic_markdown(paragraphs):
+    blocks = []
+    for i in range(paragraphs):
+        blocks.append(f"## Section {i}")
+        blocks.append(
+            f"Some **bold {i}** text with _emphasis_, `code`, a [link](/p/{i}) "
+            f"and an ![image](/images/{i}.png) in a fairly long paragraph."
+        )
+        blocks.append("\n".join(f"- item {j} with **bold**" for j in range(5)))
+    return "\n\n".join(blocks)
+
+
+def count_nodes(node):
+    count = 1
+    if node.children is not None:
+        for child in node.children:
+            count += count_nodes(child)
+    return count
+
+
+def measure(markdown):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    text_nodes = [
+        inline_markdown.text_to_textnodes(block)
+        for block in markdown_blocks.markdown_to_blocks(markdown)
+    ]
+    tree = markdown_blocks.markdown_to_html_node(markdown)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    nodes = count_nodes(tree) + sum(len(nodes) for nodes in text_nodes)
+    return after - before, nodes
+
+
+def unslotted(cls):
+    return type(cls.__name__, (cls,), {})
+
+
+def measure_unslotted(markdown):
+    patches = [
+        (inline_markdown, "TextNode", unslotted(textnode.TextNode)),
+        (markdown_blocks, "TextNode", unslotted(textnode.TextNode)),
+        (textnode, "LeafNode", unslotted(htmlnode.LeafNode)),
+        (markdown_blocks, "ParentNode", unslotted(htmlnode.ParentNode)),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, cls in patches:
+        setattr(module, name, cls)
+    try:
+        return measure(markdown)
+    finally:
+        for module, name, cls in originals:
+            setattr(module, name, cls)
+
+
+def main():
+    paragraphs = 2000
+    if len(sys.argv) > 1:
+        paragraphs = int(sys.argv[1])
+    markdown = synthetic_markdown(paragraphs)
+    before, nodes = measure_unslotted(markdown)
+    after, _ = measure(markdown)
+    print(f"{nodes} nodes from {len(markdown)} chars of markdown")
+    print(f"with __dict__  {before:>12} bytes  {before / nodes:7.1f} bytes/node")
+    print(f"with __slots__ {after:>12} bytes  {after / nodes:7.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
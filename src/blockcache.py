@@ -0,0 +1,118 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict
+
+import assets
+import highlight
+import images
+import tracing
+from diskcache import read_entry, write_entry
+
+
+default_max_bytes = 64 * 1024 * 1024
+format_version = 4
+url_pattern = re.compile(r"\]\(([^\(\)]*)\)")
+
+_cache = None
+
+
+class BlockCache:
+    def __init__(self, max_bytes=default_max_bytes, dir_path=None):
+        self.max_bytes = max_bytes
+        self.dir_path = dir_path
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        value = None
+        if entry is not None:
+            self.entries.move_to_end(key)
+            value = entry[0]
+        elif self.dir_path is not None:
+            text = read_entry(self.dir_path, key, ".json")
+            if text is not None:
+                value = json.loads(text)
+                self.remember(key, value, len(text))
+        if value is None:
+            self.misses += 1
+            tracing.count("block.miss")
+        else:
+            self.hits += 1
+            tracing.count("block.hit")
+        return value
+
+    def put(self, key, value):
+        text = json.dumps(value)
+        self.remember(key, value, len(text))
+        if self.dir_path is not None:
+            write_entry(self.dir_path, key, text, ".json")
+
+    def remember(self, key, value, size):
+        size += len(key)
+        if size > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous[1]
+        self.entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.bytes -= old_size
+            self.evictions += 1
+            tracing.count("block.evict")
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def configure(max_bytes=default_max_bytes, dir_path=None):
+    global _cache
+    if max_bytes > 0:
+        _cache = BlockCache(max_bytes, dir_path)
+    else:
+        _cache = None
+
+
+def settings():
+    if _cache is None:
+        return 0, None
+    return _cache.max_bytes, _cache.dir_path
+
+
+def get_cache():
+    return _cache
+
+
+def block_key(block, basepath):
+    _, style = highlight.settings()
+    highlighter = highlight.version()
+    dependencies = block_dependencies(block) if "](" in block else ""
+    text = (
+        f"{format_version}\0{basepath}\0{style}\0{highlighter}\0"
+        f"{dependencies}\0{block}"
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def block_dependencies(block):
+    return "\0".join(
+        f"{images.lookup(url)}\0{assets.asset_url(url)}"
+        for url in url_pattern.findall(block)
+    )
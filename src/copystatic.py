@@ -1,5 +1,11 @@
 import os
+import posixpath
 import shutil
+import time
+
+from manifest import file_hash
+from output import remove_empty_dirs, write_output
+from tracing import span
 
 
 def copy_files_recursive(source_dir_path, dest_dir_path):
@@ -14,3 +20,151 @@ def copy_files_recursive(source_dir_path, dest_dir_path):
             shutil.copy(from_path, dest_path)
         else:
             copy_files_recursive(from_path, dest_path)
+
+
+def sync_static_files(
+    source_dir_path,
+    dest_dir_path,
+    previous_files=(),
+    checksum=False,
+    hardlink=False,
+    report=None,
+    fingerprints=None,
+    transform=None,
+):
+    files = []
+    sync_files_recursive(
+        source_dir_path,
+        dest_dir_path,
+        files,
+        checksum,
+        hardlink,
+        report,
+        fingerprints or {},
+        transform,
+    )
+    current_files = set(files)
+    for dest_path in sorted(set(previous_files) - current_files):
+        if os.path.exists(dest_path):
+            print(f" * removing {dest_path}")
+            os.remove(dest_path)
+            if report is not None:
+                report.add_change(dest_path, "removed")
+        remove_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
+    return files
+
+
+def sync_files_recursive(
+    source_dir_path,
+    dest_dir_path,
+    files,
+    checksum,
+    hardlink,
+    report,
+    fingerprints,
+    transform=None,
+    url="/",
+):
+    os.makedirs(dest_dir_path, exist_ok=True)
+    with os.scandir(source_dir_path) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            dest_path = os.path.join(dest_dir_path, entry.name)
+            if entry.is_dir():
+                sync_files_recursive(
+                    entry.path,
+                    dest_path,
+                    files,
+                    checksum,
+                    hardlink,
+                    report,
+                    fingerprints,
+                    transform,
+                    url + entry.name + "/",
+                )
+                continue
+            fingerprinted = fingerprints.get(url + entry.name)
+            if fingerprinted is not None:
+                name = posixpath.basename(fingerprinted)
+                dest_path = os.path.join(dest_dir_path, name)
+            files.append(dest_path)
+            text = None if transform is None else transform(entry.path)
+            if text is not None:
+                start = time.perf_counter()
+                status = write_output(dest_path, lambda write: write(text))
+                if report is not None:
+                    report.add_static(
+                        status != "unchanged", time.perf_counter() - start
+                    )
+                    if status != "unchanged":
+                        report.add_change(dest_path, status)
+                continue
+            if is_up_to_date(entry, dest_path, checksum):
+                if report is not None:
+                    report.add_static(False)
+                continue
+            print(f" * {entry.path} -> {dest_path}")
+            status = "changed" if os.path.lexists(dest_path) else "added"
+            start = time.perf_counter()
+            with span("copy", source=entry.path):
+                tmp_path = os.path.join(dest_dir_path, f".{entry.name}.tmp")
+                if os.path.lexists(tmp_path):
+                    os.remove(tmp_path)
+                if hardlink:
+                    os.link(entry.path, tmp_path)
+                else:
+                    copy_file(entry.path, tmp_path)
+                os.replace(tmp_path, dest_path)
+            if report is not None:
+                report.add_static(True, time.perf_counter() - start)
+                report.add_change(dest_path, status)
+
+
+def is_up_to_date(entry, dest_path, checksum):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    source_stat = entry.stat()
+    if os.path.samestat(source_stat, dest_stat):
+        return True
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+    if checksum:
+        return file_hash(entry.path) == file_hash(dest_path)
+    return source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def copy_file(from_path, dest_path):
+    with open(from_path, "rb") as from_file, open(dest_path, "wb") as to_file:
+        size = os.fstat(from_file.fileno()).st_size
+        for copy_range in (copy_with_file_range, copy_with_sendfile):
+            try:
+                copy_range(from_file.fileno(), to_file.fileno(), size)
+                break
+            except (AttributeError, OSError):
+                from_file.seek(0)
+                to_file.seek(0)
+                to_file.truncate()
+        else:
+            shutil.copyfileobj(from_file, to_file)
+    shutil.copymode(from_path, dest_path)
+    stat = os.stat(from_path)
+    os.utime(dest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def copy_with_file_range(from_fd, to_fd, size):
+    copied = 0
+    while copied < size:
+        sent = os.copy_file_range(from_fd, to_fd, size - copied)
+        if sent == 0:
+            break
+        copied += sent
+
+
+def copy_with_sendfile(from_fd, to_fd, size):
+    copied = 0
+    while copied < size:
+        sent = os.sendfile(to_fd, from_fd, copied, size - copied)
+        if sent == 0:
+            break
+        copied += sent
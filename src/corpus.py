@@ -0,0 +1,164 @@
+import os
+import random
+import struct
+import zlib
+
+
+words = (
+    "the of and to in is was he for it with as his on be at by had are but from "
+    "or have an they which one you were all we her she there would their will "
+    "ring elf dwarf hobbit wizard mountain river shire forest tower road king "
+    "shadow light sword song star stone ancient journey fellowship council"
+).split()
+
+template = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+stylesheet = """/* synthetic corpus stylesheet */
+body {
+  font-family: sans-serif;
+  margin: 0 auto;
+  max-width: 40em;
+}
+
+pre {
+  padding: 1em;
+}
+"""
+
+
+class CorpusConfig:
+    def __init__(
+        self,
+        pages=100,
+        blocks=20,
+        words_per_block=60,
+        link_density=0.05,
+        image_density=0.01,
+        emphasis_density=0.05,
+        list_ratio=0.15,
+        code_ratio=0.1,
+        images=10,
+        seed=0,
+    ):
+        self.pages = pages
+        self.blocks = blocks
+        self.words_per_block = words_per_block
+        self.link_density = link_density
+        self.image_density = image_density
+        self.emphasis_density = emphasis_density
+        self.list_ratio = list_ratio
+        self.code_ratio = code_ratio
+        self.images = images
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def generate_corpus(dir_path, config):
+    rng = random.Random(config.seed)
+    dir_path_content = os.path.join(dir_path, "content")
+    dir_path_static = os.path.join(dir_path, "static")
+    os.makedirs(os.path.join(dir_path_static, "images"), exist_ok=True)
+
+    with open(os.path.join(dir_path, "template.html"), "w") as f:
+        f.write(template)
+    with open(os.path.join(dir_path_static, "index.css"), "w") as f:
+        f.write(stylesheet)
+    for i in range(config.images):
+        width = rng.randint(16, 640)
+        height = rng.randint(16, 480)
+        with open(os.path.join(dir_path_static, "images", f"{i}.png"), "wb") as f:
+            f.write(png_bytes(width, height))
+
+    urls = [page_url(i) for i in range(config.pages)]
+    for i in range(config.pages):
+        page_dir = os.path.join(dir_path_content, *page_url(i).strip("/").split("/"))
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), "w") as f:
+            f.write(markdown_page(rng, config, i, urls))
+    return dir_path_content, dir_path_static, os.path.join(dir_path, "template.html")
+
+
+def page_url(i):
+    return f"/section{i % 10}/page{i}"
+
+
+def markdown_page(rng, config, index, urls):
+    blocks = [f"# Page {index}"]
+    for i in range(config.blocks):
+        roll = rng.random()
+        if i % 5 == 0:
+            blocks.append(f"## Section {i // 5}")
+        elif roll < config.code_ratio:
+            blocks.append(code_block(rng, config))
+        elif roll < config.code_ratio + config.list_ratio:
+            blocks.append(list_block(rng, config, urls))
+        else:
+            blocks.append(inline_text(rng, config, config.words_per_block, urls))
+    return "\n\n".join(blocks) + "\n"
+
+
+def code_block(rng, config):
+    lines = []
+    for i in range(rng.randint(3, 12)):
+        lines.append(f"value_{i} = compute({rng.choice(words)!r}, {i})")
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def list_block(rng, config, urls):
+    count = rng.randint(3, 8)
+    if rng.random() < 0.5:
+        return "\n".join(
+            f"- {inline_text(rng, config, 8, urls)}" for _ in range(count)
+        )
+    return "\n".join(
+        f"{i + 1}. {inline_text(rng, config, 8, urls)}" for i in range(count)
+    )
+
+
+def inline_text(rng, config, count, urls):
+    parts = []
+    for _ in range(count):
+        word = rng.choice(words)
+        roll = rng.random()
+        if roll < config.link_density:
+            parts.append(f"[{word}]({rng.choice(urls)})")
+            continue
+        roll -= config.link_density
+        if roll < config.image_density and config.images:
+            parts.append(f"![{word}](/images/{rng.randrange(config.images)}.png)")
+            continue
+        roll -= config.image_density
+        if roll < config.emphasis_density:
+            parts.append(rng.choice(["**{}**", "_{}_", "`{}`"]).format(word))
+            continue
+        parts.append(word)
+    return " ".join(parts)
+
+
+def png_bytes(width, height):
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    pixels = zlib.compress(b"".join(b"\x00" + b"\x80" * width for _ in range(height)))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", pixels)
+        + chunk(b"IEND", b"")
+    )
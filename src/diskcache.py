@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+
+def entry_path(dir_path, key, suffix):
+    return os.path.join(dir_path, key[:2], key + suffix)
+
+
+def read_entry(dir_path, key, suffix=".html"):
+    try:
+        with open(entry_path(dir_path, key, suffix), "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_entry(dir_path, key, text, suffix=".html"):
+    path = entry_path(dir_path, key, suffix)
+    entry_dir_path = os.path.dirname(path)
+    os.makedirs(entry_dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=entry_dir_path, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
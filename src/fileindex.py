@@ -0,0 +1,61 @@
+import json
+import os
+from pathlib import Path
+
+import tracing
+
+
+def build_file_index(dir_path, cache_path, compute, name, extensions=None):
+    cache = load_cache(cache_path)
+    entries = {}
+    if os.path.isdir(dir_path):
+        scan_files(dir_path, dir_path, cache, entries, compute, name, extensions)
+    if cache_path is not None and entries != cache:
+        save_cache(cache_path, entries)
+    return {url: entry["value"] for url, entry in entries.items()}
+
+
+def scan_files(dir_path, root, cache, entries, compute, name, extensions):
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            if entry.is_dir():
+                scan_files(entry.path, root, cache, entries, compute, name, extensions)
+                continue
+            if extensions is not None and not entry.name.lower().endswith(extensions):
+                continue
+            stat = entry.stat()
+            url = "/" + Path(os.path.relpath(entry.path, root)).as_posix()
+            cached = cache.get(url)
+            if (
+                cached is not None
+                and cached.get("mtime_ns") == stat.st_mtime_ns
+                and cached.get("size") == stat.st_size
+                and "value" in cached
+            ):
+                tracing.count(f"{name}.hit")
+                entries[url] = cached
+                continue
+            tracing.count(f"{name}.miss")
+            entries[url] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "value": compute(entry.path),
+            }
+
+
+def load_cache(cache_path):
+    if cache_path is None or not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, "r") as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return {}
+
+
+def save_cache(cache_path, entries):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, cache_path)
@@ -0,0 +1,118 @@
+import os
+from itertools import chain
+from pathlib import Path
+
+from fileindex import build_file_index
+
+
+delimiter = "---"
+max_header_bytes = 16384
+content_extensions = (".md",)
+
+_drafts = False
+
+
+def configure(drafts=False):
+    global _drafts
+    _drafts = drafts
+
+
+def read_header(lines):
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None or first.rstrip() != delimiter:
+        return None
+    header = []
+    size = len(first)
+    for line in lines:
+        if line.rstrip() == delimiter:
+            return header
+        size += len(line)
+        if size > max_header_bytes:
+            return None
+        header.append(line)
+    return None
+
+
+def parse_front_matter(header):
+    front_matter = {}
+    for line in header:
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        key, separator, value = line.partition(":")
+        if separator:
+            front_matter[key.strip()] = parse_value(value.strip())
+    tags = front_matter.get("tags")
+    if isinstance(tags, str):
+        front_matter["tags"] = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    if "draft" in front_matter:
+        front_matter["draft"] = front_matter["draft"] is True
+    return front_matter
+
+
+def parse_value(text):
+    if text.startswith("[") and text.endswith("]"):
+        items = [item.strip() for item in text[1:-1].split(",")]
+        return [parse_scalar(item) for item in items if item]
+    return parse_scalar(text)
+
+
+def parse_scalar(text):
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    return text
+
+
+def split_front_matter(lines):
+    lines = iter(lines)
+    consumed = []
+    header = read_header(recorded(lines, consumed))
+    if header is None:
+        return {}, chain(consumed, lines), 1
+    return parse_front_matter(header), lines, len(consumed) + 1
+
+
+def recorded(lines, consumed):
+    for line in lines:
+        consumed.append(line)
+        yield line
+
+
+def read_front_matter(path):
+    with open(path, "r") as f:
+        header = read_header(f)
+    if header is None:
+        return {}
+    return parse_front_matter(header)
+
+
+def scan_front_matter(dir_path_content):
+    return build_file_index(
+        dir_path_content,
+        None,
+        read_front_matter,
+        "frontmatter",
+        content_extensions,
+    )
+
+
+def content_url(from_path, dir_path_content):
+    return "/" + Path(os.path.relpath(from_path, dir_path_content)).as_posix()
+
+
+def is_published(front_matter):
+    return _drafts or not front_matter.get("draft", False)
+
+
+def layout_path(template_path, front_matter):
+    layout = front_matter.get("layout")
+    if layout is None:
+        return template_path
+    name = layout if isinstance(layout, str) else ""
+    if name in ("", ".", "..") or "/" in name or os.sep in name:
+        raise ValueError(f"invalid layout: {layout}")
+    return os.path.join(os.path.dirname(template_path), "layouts", f"{name}.html")
+
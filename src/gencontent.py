@@ -1,48 +1,459 @@
+import io
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
 from pathlib import Path
-from markdown_blocks import markdown_to_html_node
 
+import assets
+import blockcache
+import frontmatter
+import highlight
+import images
+import minify
+import pipeline
+import search
+import tracing
+from linkcheck import check_page_links
+from manifest import file_hash
+from markdown_blocks import page_title, write_markdown_html
+from metadata import PageMetadata
+from output import remove_empty_dirs, write_output
+from template import load_template, root_url_pattern
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    pages=None,
+    jobs=1,
+    report=None,
+    search_index=None,
+    link_index=None,
+):
+    if pages is None:
+        published = (
+            (from_path, dest_path)
+            for from_path, dest_path in iter_pages(dir_path_content, dest_dir_path)
+            if frontmatter.is_published(frontmatter.read_front_matter(from_path))
+        )
+        return generate_pages(
+            published, template_path, basepath, jobs, report, search_index
+        )
+
+    template_hashes = {}
+    pages.begin()
+
+    def stale_pages():
+        for from_path, dest_path in iter_pages(dir_path_content, dest_dir_path):
+            previous = pages.get(from_path)
+            stat = os.stat(from_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            cached = previous is not None and previous["stamp"] == stamp
+            if cached:
+                front_matter = previous["front_matter"]
+            else:
+                front_matter = frontmatter.read_front_matter(from_path)
+            if report is not None:
+                report.count("frontmatter.hit" if cached else "frontmatter.miss")
+            if not frontmatter.is_published(front_matter):
+                continue
+            page_template_path = page_template(template_path, front_matter)
+            if page_template_path not in template_hashes:
+                template_hashes[page_template_path] = (
+                    (file_hash(page_template_path), template_assets(page_template_path))
+                    if os.path.exists(page_template_path)
+                    else (None, {})
+                )
+            template_hash, assets_used = template_hashes[page_template_path]
+            entry = {
+                "source_hash": file_hash(from_path),
+                "template_path": page_template_path,
+                "template_hash": template_hash,
+                "basepath": basepath,
+                "dest_path": str(dest_path),
+            }
+            url = output_url(dest_path, dest_dir_path)
+            if previous is not None:
+                entry.update(page_dependencies(previous["metadata"], assets_used))
+                if previous["entry"] == entry and os.path.exists(dest_path):
+                    pages.skip(from_path, stamp, front_matter)
+                    check_links(from_path, url, previous["metadata"])
+                    if report is not None:
+                        report.skip_page(from_path, previous["stats"])
+                    continue
+            pages.put(from_path, url, entry, stamp, front_matter)
+            yield from_path, dest_path
+
+    def check_links(from_path, url, page):
+        if link_index is not None and page is not None:
+            check_page_links(link_index, pages, from_path, url, page)
+
+    def finish_page(from_path, page, stats):
+        entry = pages.entry(from_path)
+        _, assets_used = template_hashes[entry["template_path"]]
+        entry = {key: entry[key] for key in entry if key not in ("images", "assets")}
+        entry.update(page_dependencies(page, assets_used))
+        previous = pages.complete(
+            from_path, entry, page, stats["seconds"], stats["bytes"]
+        )
+        check_links(from_path, output_url(entry["dest_path"], dest_dir_path), page)
+        return previous
+
+    errors = generate_pages(
+        stale_pages(),
+        template_path,
+        basepath,
+        jobs,
+        report,
+        search_index,
+        finish_page,
+    )
+    for from_path, _ in errors:
+        pages.delete(from_path)
+
+    for from_path, entry in pages.unseen():
+        pages.delete(from_path)
+        if search_index is not None:
+            search_index.remove_page(from_path)
+        dest_path = entry["dest_path"]
+        if pages.claimed(output_url(dest_path, dest_dir_path)):
+            continue
+        remove_page(dest_path, dest_dir_path)
+        if report is not None:
+            report.add_change(dest_path, "removed")
+    return errors
+
+
+def output_url(dest_path, dest_dir_path):
+    return "/" + Path(os.path.relpath(dest_path, dest_dir_path)).as_posix()
+
+
+def page_dependencies(page, template_assets_used=None):
+    if page is None:
+        return {}
+    urls = [url for url, _ in page["links"] + page["images"]]
+    dependencies = {
+        "images": images.dependencies(url for url, _ in page["images"]),
+        "assets": dict(template_assets_used or {}, **assets.dependencies(urls)),
+    }
+    return {key: value for key, value in dependencies.items() if value}
+
+
+def template_assets(template_path):
+    with open(template_path, "r") as f:
+        urls = ["/" + match[2] for match in root_url_pattern.finditer(f.read())]
+    if highlight.available():
+        urls.append("/" + highlight.stylesheet_name)
+    return assets.dependencies(urls)
+
+
+def page_template(template_path, front_matter):
+    try:
+        return frontmatter.layout_path(template_path, front_matter)
+    except ValueError:
+        return template_path
+
+
+def generate_pages(
+    pages,
+    template_path,
+    basepath,
+    jobs=1,
+    report=None,
+    search_index=None,
+    finish_page=None,
+):
+    tasks = (
+        (from_path, template_path, dest_path, basepath)
+        for from_path, dest_path in pages
+    )
+    head = list(islice(tasks, 2 if jobs <= 1 else jobs * 4 * pipeline.max_chunksize))
+    tasks = chain(head, tasks)
+    if len(head) <= 1:
+        jobs = 1
+    if jobs <= 1 and pipeline.enabled():
+        errors = collect_results(
+            pipeline.run(tasks, read_task, render_task, write_task),
+            report,
+            search_index,
+            finish_page,
+        )
+        if report is not None:
+            report.add_stats(*tracing.take_stats())
+        return errors
+    if jobs <= 1:
+        return collect_results(
+            map(try_generate_page, tasks), report, search_index, finish_page
+        )
+
+    chunksize = max(1, min(pipeline.max_chunksize, len(head) // (jobs * 4)))
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=start_worker,
+        initargs=(worker_settings(),),
+    ) as executor:
+        return collect_results(
+            pipeline.imap(executor, try_generate_page, tasks, chunksize, jobs * 2),
+            report,
+            search_index,
+            finish_page,
+        )
+
+
+def worker_settings():
+    return {
+        "tracing": tracing.settings(),
+        "highlight": highlight.settings(),
+        "blockcache": blockcache.settings(),
+        "images": images.settings(),
+        "assets": assets.settings(),
+        "minify": minify.settings(),
+        "search": search.settings(),
+    }
+
+
+def start_worker(settings):
+    tracing.start_worker(settings["tracing"])
+    highlight.configure(*settings["highlight"])
+    blockcache.configure(*settings["blockcache"])
+    images.configure(*settings["images"])
+    assets.configure(*settings["assets"])
+    minify.configure(*settings["minify"])
+    search.configure(*settings["search"])
+
+
+def collect_results(results, report, search_index=None, finish_page=None):
+    errors = []
+    for from_path, error, events, stats in results:
+        tracing.add_events(events)
+        if error is not None:
+            errors.append((from_path, error))
+            if search_index is not None:
+                search_index.remove_page(from_path)
+            continue
+        document = stats.pop("document", None)
+        page = stats.pop("metadata")
+        previous = None
+        if finish_page is not None:
+            previous = finish_page(from_path, page, stats)
+        if search_index is not None and document is not None:
+            search_index.add_page(from_path, stats["dest"], document)
+        if report is not None:
+            report.add_page(stats, previous)
+    return errors
+
+
+def try_generate_page(task):
+    from_path, _, dest_path, _ = task
+    tracing.take_stats()
+    error = None
+    status = None
+    page = None
+    start = time.perf_counter()
+    try:
+        status, page = generate_page(*task)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - start
+    stage_times, counters = tracing.take_stats()
+    stage_times["other"] = stage_times.pop("page", 0.0)
+    stats = page_stats(
+        from_path, dest_path, seconds, status, page, error, stage_times, counters
+    )
+    return from_path, error, tracing.collect(), stats
+
+
+def read_task(task):
+    from_path = task[0]
+    start = time.perf_counter()
+    try:
+        if os.path.getsize(from_path) > pipeline.max_buffered_bytes:
+            return None, time.perf_counter() - start, None
+        text = read_source(from_path)
+    except Exception as e:
+        return None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return text, time.perf_counter() - start, None
+
+
+def render_task(task, source):
+    from_path, template_path, dest_path, basepath = task
+    text, seconds, error = source
+    html = None
+    page = None
+    status = None
+    if error is None:
+        start = time.perf_counter()
+        try:
+            if text is None:
+                status, page = write_page(*task)
+            else:
+                print(f" * {from_path} {template_path} -> {dest_path}")
+                chunks = []
+                page = render_output(
+                    io.StringIO(text), template_path, basepath, chunks.append
+                )
+                html = "".join(chunks)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        seconds += time.perf_counter() - start
+    return html, page, status, seconds, error
+
+
+def write_task(task, rendered):
+    from_path, _, dest_path, _ = task
+    html, page, status, seconds, error = rendered
+    if error is None and html is not None:
+        start = time.perf_counter()
+        try:
+            dest_dir_path = os.path.dirname(dest_path)
+            if dest_dir_path != "":
+                os.makedirs(dest_dir_path, exist_ok=True)
+            status = write_output(dest_path, lambda write: write(html))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            page = None
+        seconds += time.perf_counter() - start
+    stats = page_stats(from_path, dest_path, seconds, status, page, error, {}, {})
+    return from_path, error, [], stats
+
+
+def page_stats(from_path, dest_path, seconds, status, page, error, stages, counters):
+    stats = {
+        "source": from_path,
+        "dest": str(dest_path),
+        "seconds": seconds,
+        "bytes": 0 if error else os.path.getsize(dest_path),
+        "status": status,
+        "stages": stages,
+        "counters": counters,
+    }
+    if page is not None:
+        blocks = page.pop("blocks", None)
+        if search.enabled():
+            stats["document"] = {
+                "title": page["title"],
+                "terms": search.page_terms(page["title"], blocks),
+            }
+        stats["metadata"] = page
+    return stats
+
+
+def find_pages(dir_path_content, dest_dir_path):
+    return list(iter_pages(dir_path_content, dest_dir_path))
+
+
+def iter_pages(dir_path_content, dest_dir_path):
+    stack = [iter(sorted_entries(dir_path_content, dest_dir_path))]
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+            continue
+        entry, dest_path = item
+        if entry.is_dir():
+            stack.append(iter(sorted_entries(entry.path, dest_path)))
         else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            yield entry.path, Path(dest_path).with_suffix(".html")
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
+def sorted_entries(dir_path, dest_dir_path):
+    with os.scandir(dir_path) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    return [(entry, os.path.join(dest_dir_path, entry.name)) for entry in entries]
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
+def remove_page(dest_path, dest_dir_path):
+    print(f" * removing {dest_path}")
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    remove_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', 'href="' + basepath)
-    template = template.replace('src="/', 'src="' + basepath)
 
+def generate_page(from_path, template_path, dest_path, basepath):
+    with tracing.span("page", source=from_path):
+        return write_page(from_path, template_path, dest_path, basepath)
+
+
+def write_page(from_path, template_path, dest_path, basepath):
+    print(f" * {from_path} {template_path} -> {dest_path}")
     dest_dir_path = os.path.dirname(dest_path)
     if dest_dir_path != "":
         os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
+    page = {}
+
+    def render(write):
+        with open(from_path, "r") as from_file:
+            page.update(render_output(from_file, template_path, basepath, write))
+
+    status = write_output(dest_path, render)
+    return status, page
+
+
+def render_output(source, template_path, basepath, write):
+    if not minify.enabled():
+        return render_source(source, template_path, basepath, write)
+    minifier = minify.HtmlMinifier(write)
+    page = render_source(source, template_path, basepath, minifier.write)
+    with tracing.span("minify"):
+        minifier.close()
+    return page
+
+
+def read_source(from_path):
+    with tracing.span("read"):
+        with open(from_path, "r") as from_file:
+            return from_file.read()
+
+
+def render_page(from_path, template_path, basepath, write):
+    with open(from_path, "r") as from_file:
+        return render_source(from_file, template_path, basepath, write)
+
+
+def render_source(source, template_path, basepath, write):
+    with tracing.span("read"):
+        front_matter, body, _ = frontmatter.split_front_matter(source)
+        title = front_matter.get("title")
+        if title is None:
+            title = page_title(body)
+        source.seek(0)
+    if title is None:
+        raise ValueError("no title found")
+    with tracing.span("template load"):
+        template = load_template(
+            frontmatter.layout_path(template_path, front_matter), basepath
+        )
+    _, body, first_line = frontmatter.split_front_matter(source)
+    metadata = PageMetadata()
+    blocks = [] if search.enabled() else None
+
+    def write_content(write):
+        write_markdown_html(body, write, basepath, blocks, metadata, first_line)
+
+    with tracing.span("template fill"):
+        template.write(
+            write,
+            {
+                "Title": title,
+                "Stylesheet": highlight.stylesheet_link(basepath),
+                "Content": write_content,
+            },
+        )
+    page = dict(metadata.to_dict(), title=title, front_matter=front_matter)
+    if blocks is not None:
+        page["blocks"] = blocks
+    return page
 
 
 def extract_title(md):
-    lines = md.split("\n")
+    return find_title(md.split("\n"))
+
+
+def find_title(lines):
     for line in lines:
         if line.startswith("# "):
-            return line[2:]
+            return line[2:].rstrip("\n")
     raise ValueError("no title found")
@@ -0,0 +1,120 @@
+import hashlib
+import importlib.util
+
+import assets
+import tracing
+from diskcache import read_entry, write_entry
+
+
+default_style = "default"
+stylesheet_name = "highlight.css"
+memory_cache_entries = 1024
+
+_cache_dir_path = None
+_style = default_style
+_memory_cache = {}
+_lexers = {}
+_formatter = None
+_available = None
+_version = None
+
+
+def configure(cache_dir_path=None, style=default_style):
+    global _cache_dir_path, _style, _formatter
+    _cache_dir_path = cache_dir_path
+    _style = style
+    _formatter = None
+    _memory_cache.clear()
+
+
+def settings():
+    return _cache_dir_path, _style
+
+
+def highlight_code(code, language):
+    key = hashlib.sha256(f"{language}\0{_style}\0{code}".encode("utf-8")).hexdigest()
+    html = _memory_cache.get(key)
+    if html is None and _cache_dir_path is not None:
+        html = read_entry(_cache_dir_path, key)
+    if html is not None:
+        tracing.count("highlight.hit")
+        remember(key, html)
+        return html
+
+    lexer = get_lexer(language)
+    if lexer is None:
+        return None
+    tracing.count("highlight.miss")
+    from pygments import highlight
+
+    with tracing.span("highlight", language=language):
+        html = highlight(code, lexer, get_formatter())
+    remember(key, html)
+    if _cache_dir_path is not None:
+        write_entry(_cache_dir_path, key, html)
+    return html
+
+
+def remember(key, html):
+    if len(_memory_cache) >= memory_cache_entries:
+        _memory_cache.clear()
+    _memory_cache[key] = html
+
+
+def get_lexer(language):
+    if language in _lexers:
+        return _lexers[language]
+    try:
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        _lexers[language] = None
+        return None
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        lexer = None
+    _lexers[language] = lexer
+    return lexer
+
+
+def get_formatter():
+    global _formatter
+    if _formatter is None:
+        from pygments.formatters import HtmlFormatter
+
+        _formatter = HtmlFormatter(nowrap=True, style=_style)
+    return _formatter
+
+
+def available():
+    global _available
+    if _available is None:
+        _available = importlib.util.find_spec("pygments") is not None
+    return _available
+
+
+def version():
+    global _version
+    if not available():
+        return ""
+    if _version is None:
+        from pygments import __version__
+
+        _version = __version__
+    return _version
+
+
+def stylesheet_link(basepath="/"):
+    if not available():
+        return ""
+    url = assets.asset_url("/" + stylesheet_name)
+    return f'<link href="{basepath}{url[1:]}" rel="stylesheet" />'
+
+
+def stylesheet(style=None):
+    try:
+        from pygments.formatters import HtmlFormatter
+    except ImportError:
+        return None
+    return HtmlFormatter(style=style or _style).get_style_defs(".highlight")
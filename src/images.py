@@ -0,0 +1,105 @@
+import os
+import struct
+
+from fileindex import build_file_index
+
+
+image_extensions = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+jpeg_sof_markers = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+_dimensions = {}
+
+
+def configure(dimensions=None):
+    global _dimensions
+    _dimensions = dimensions or {}
+
+
+def settings():
+    return (_dimensions,)
+
+
+def dependencies(urls):
+    found = {}
+    for url in urls:
+        if url.startswith("/"):
+            dimensions = lookup(url)
+            found[url] = None if dimensions is None else list(dimensions)
+    return found
+
+
+def lookup(url):
+    if not url.startswith("/") or url.startswith("//"):
+        return None
+    return _dimensions.get(url.split("?", 1)[0].split("#", 1)[0])
+
+
+def image_props(props):
+    props = dict(props)
+    dimensions = lookup(props.get("src", ""))
+    if dimensions is not None:
+        props["width"] = str(dimensions[0])
+        props["height"] = str(dimensions[1])
+    props["loading"] = "lazy"
+    props["decoding"] = "async"
+    return props
+
+
+def build_index(dir_path_static, cache_path=None):
+    sizes = build_file_index(
+        dir_path_static, cache_path, image_size, "image", image_extensions
+    )
+    return {url: tuple(size) for url, size in sizes.items() if size is not None}
+
+
+def image_size(path):
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return jpeg_size(f)
+    return None
+
+
+def webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20:21] == b"\x2f":
+        bits = struct.unpack("<I", head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def jpeg_size(f):
+    while True:
+        if f.read(1) != b"\xff":
+            return None
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if marker == b"" or marker[0] in (0xD9, 0xDA):
+            return None
+        if 0xD0 <= marker[0] <= 0xD8 or marker[0] == 0x01:
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        if marker[0] in jpeg_sof_markers:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack(">HH", data[1:5])
+            return width, height
+        f.seek(struct.unpack(">H", length)[0] - 2, os.SEEK_CUR)
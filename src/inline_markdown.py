@@ -3,7 +3,65 @@ import re
 from textnode import TextNode, TextType
 
 
+image_pattern = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+link_pattern = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+delimiters = (
+    ("**", TextType.BOLD),
+    ("_", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+
+
 def text_to_textnodes(text):
+    nodes = []
+    if text != "":
+        split_text(text, 0, nodes)
+    return nodes
+
+
+def split_text(text, level, nodes):
+    while level < len(delimiters) and delimiters[level][0] not in text:
+        level += 1
+    if level == len(delimiters):
+        split_images(text, nodes)
+        return
+    delimiter, text_type = delimiters[level]
+    sections = text.split(delimiter)
+    if len(sections) % 2 == 0:
+        raise ValueError("invalid markdown, formatted section not closed")
+    for i in range(len(sections)):
+        if sections[i] == "":
+            continue
+        if i % 2 == 0:
+            split_text(sections[i], level + 1, nodes)
+        else:
+            nodes.append(TextNode(sections[i], text_type))
+
+
+def split_images(text, nodes):
+    if "](" not in text:
+        nodes.append(TextNode(text, TextType.TEXT))
+        return
+    start = 0
+    for match in image_pattern.finditer(text):
+        split_links(text[start : match.start()], nodes)
+        nodes.append(TextNode(match[1], TextType.IMAGE, match[2]))
+        start = match.end()
+    split_links(text[start:], nodes)
+
+
+def split_links(text, nodes):
+    start = 0
+    for match in link_pattern.finditer(text):
+        if match.start() > start:
+            nodes.append(TextNode(text[start : match.start()], TextType.TEXT))
+        nodes.append(TextNode(match[1], TextType.LINK, match[2]))
+        start = match.end()
+    if start < len(text):
+        nodes.append(TextNode(text[start:], TextType.TEXT))
+
+
+def text_to_textnodes_reference(text):
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
     nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
@@ -0,0 +1,86 @@
+import os
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import assets
+
+
+scheme_pattern = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.\-]*:")
+
+
+class OutputIndex:
+    def __init__(self, dir_path_public, pages=None):
+        self.dir_path_public = dir_path_public
+        self.pages = pages
+        self.outputs = {}
+
+    def output_url(self, path):
+        return "/" + Path(os.path.relpath(path, self.dir_path_public)).as_posix()
+
+    def add_output(self, path, anchors=None):
+        anchors = None if anchors is None else tuple(anchors)
+        self.outputs[self.output_url(path)] = anchors
+
+    def lookup(self, url):
+        if url in self.outputs:
+            return True, self.outputs[url]
+        if self.pages is not None:
+            anchors = self.pages.anchors(url)
+            if anchors is not None:
+                return True, anchors
+        return False, None
+
+    def find(self, path):
+        if path.endswith("/"):
+            candidates = (path + "index.html",)
+        else:
+            candidates = (path, path + ".html", path + "/index.html")
+        for candidate in candidates:
+            found, anchors = self.lookup(assets.asset_url(candidate))
+            if found:
+                return True, anchors
+        return False, None
+
+    def check(self, page_url, url):
+        if url.startswith("//") or scheme_pattern.match(url):
+            return None
+        parts = urlsplit(url)
+        path = unquote(parts.path)
+        if path == "":
+            found, anchors = self.lookup(page_url)
+        else:
+            if not path.startswith("/"):
+                directory = posixpath.dirname(page_url)
+                resolved = posixpath.normpath(posixpath.join(directory, path))
+                path = resolved.rstrip("/") + "/" if path.endswith("/") else resolved
+            found, anchors = self.find(path)
+            if not found:
+                return "missing page"
+        if parts.fragment and anchors is not None and parts.fragment not in anchors:
+            return "missing anchor"
+        return None
+
+
+def index_outputs(dir_path_public, manifest, pages=None):
+    index = OutputIndex(dir_path_public, pages)
+    for path in manifest.get("static", []) + manifest.get("generated", []):
+        index.add_output(path)
+    return index
+
+
+def check_page_links(index, pages, from_path, page_url, page):
+    for url, line in page["links"] + page["images"]:
+        if index.check(page_url, url) is not None:
+            pages.defer_link(from_path, url, line)
+
+
+def check_links(index, pages):
+    broken = []
+    for from_path, page_url, url, line in pages.deferred_links():
+        reason = index.check(page_url, url)
+        if reason is not None:
+            broken.append((from_path, line, url, reason))
+    broken.sort(key=lambda link: (link[0], link[1]))
+    return broken
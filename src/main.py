@@ -1,32 +1,334 @@
+import argparse
+import json
 import os
 import shutil
 import sys
 
-from copystatic import copy_files_recursive
+import assets
+import blockcache
+import frontmatter
+import highlight
+import images
+import memory
+import minify
+import pipeline
+import precompress
+import search
+import tracing
+from copystatic import sync_static_files
 from gencontent import generate_pages_recursive
+from linkcheck import check_links, index_outputs
+from manifest import PageStore, load_manifest, save_manifest
+from output import write_output
+from report import BuildReport, load_report, print_report, save_changes, save_report
+from search import SearchIndex
+from server import serve
 
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
+dir_path_cache = "./.cache"
 template_path = "./template.html"
+manifest_path = os.path.join(dir_path_cache, "manifest.json")
+pages_path = os.path.join(dir_path_cache, "pages.db")
+report_path = os.path.join(dir_path_cache, "build-report.json")
+changes_path = os.path.join(dir_path_cache, "build-changes.json")
+highlight_cache_path = os.path.join(dir_path_cache, "highlight")
+block_cache_path = os.path.join(dir_path_cache, "blocks")
+image_index_path = os.path.join(dir_path_cache, "images.json")
+asset_index_path = os.path.join(dir_path_cache, "assets.json")
+minify_cache_path = os.path.join(dir_path_cache, "minified")
+search_path = os.path.join(dir_path_cache, "search.db")
+dir_path_search = os.path.join(dir_path_public, "search")
 default_basepath = "/"
 
 
 def main():
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve(sys.argv[2:], dir_path_content, dir_path_static, template_path)
+        return
 
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("basepath", nargs="?", default=default_basepath)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="delete the public directory and rebuild every page",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes used to render pages",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        metavar="N",
+        help="threads reading sources and writing pages while a single process "
+        "renders (0 reads, renders and writes one page at a time); only used "
+        f"with --jobs 1 (default: {pipeline.default_io_threads})",
+    )
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        metavar="N",
+        help="pages read ahead of, and written behind, the renderer; only used "
+        f"with --jobs 1 (default: {pipeline.default_queue_depth})",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--hardlink",
+        action="store_true",
+        help="hardlink static files into the public directory instead of copying",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="write a Chrome/Perfetto trace of the build to PATH",
+    )
+    parser.add_argument(
+        "--highlight-style",
+        default=highlight.default_style,
+        help="Pygments style used for fenced code blocks with a language",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="add content hashes to static asset names and rewrite references",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="build a sharded client-side search index in the public directory",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also build pages marked as drafts in their front matter",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="minify rendered HTML and static CSS",
+    )
+    parser.add_argument(
+        "--precompress",
+        nargs="?",
+        const="gzip",
+        default="",
+        metavar="ENCODINGS",
+        help="write precompressed siblings of text outputs (gzip, deflate; "
+        "comma separated, default gzip)",
+    )
+    parser.add_argument(
+        "--compress-threshold",
+        type=int,
+        default=precompress.default_threshold,
+        metavar="BYTES",
+        help="smallest output that is precompressed",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=float,
+        default=blockcache.default_max_bytes / 1048576,
+        metavar="MIB",
+        help="memory bound of the per-process rendered block cache (0 disables it)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        metavar="MIB",
+        help="cap worker processes, in-flight pages and block caches to fit "
+        "this many MiB, and warn when the peak RSS exceeds it",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="trace Python allocations and report their peak and top sites",
+    )
+    parser.add_argument(
+        "--persist-blocks",
+        action="store_true",
+        help="also keep rendered blocks in the cache directory across builds",
+    )
+    args = parser.parse_args()
+    encodings = [encoding for encoding in args.precompress.split(",") if encoding]
+    for encoding in encodings:
+        if encoding not in precompress.encoding_suffixes:
+            parser.error(f"unsupported encoding: {encoding}")
+    if args.tracemalloc:
+        memory.start_tracemalloc()
+    if args.memory_budget is not None:
+        memory.configure(int(args.memory_budget * 1048576))
+    args.jobs = memory.limit_jobs(args.jobs)
+    if args.jobs > 1 and (args.io_threads is not None or args.queue_depth is not None):
+        print(" ! --io-threads and --queue-depth only apply with --jobs 1")
+    if args.io_threads is None:
+        args.io_threads = pipeline.default_io_threads
+    if args.queue_depth is None:
+        args.queue_depth = pipeline.default_queue_depth
+    tracing.enable(record_events=bool(args.trace))
+    minify.configure(args.minify)
+    search.configure(args.search)
+    pipeline.configure(args.io_threads, memory.limit_queue_depth(args.queue_depth))
+    frontmatter.configure(args.drafts)
+    highlight.configure(highlight_cache_path, args.highlight_style)
+    blockcache.configure(
+        memory.limit_cache_bytes(int(args.block_cache_size * 1048576), args.jobs + 1),
+        block_cache_path if args.persist_blocks else None,
+    )
+    previous_report = load_report(report_path)
+    report = BuildReport()
+    with tracing.span("image index"):
+        images.configure(images.build_index(dir_path_static, image_index_path))
+    stylesheet = highlight.stylesheet()
+    if stylesheet is not None and args.minify:
+        stylesheet = minify.minify_css(stylesheet)
+    asset_map = {}
+    if args.fingerprint:
+        with tracing.span("fingerprint"):
+            asset_map = assets.build_asset_map(
+                dir_path_static,
+                asset_index_path,
+                minify_static if args.minify else None,
+            )
+        if stylesheet is not None:
+            url = "/" + highlight.stylesheet_name
+            digest = assets.text_digest(stylesheet)
+            asset_map[url] = assets.fingerprinted_url(url, digest)
+    assets.configure(asset_map)
+    report.add_stats(*tracing.take_stats())
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
+    if args.full:
+        print("Deleting public directory...")
+        if os.path.exists(dir_path_public):
+            shutil.rmtree(dir_path_public)
+        manifest = {}
+    else:
+        manifest = load_manifest(manifest_path)
+    pages = PageStore(pages_path)
+    settings = {
+        "highlight_style": args.highlight_style if stylesheet is not None else None,
+        "minify": args.minify,
+        "search": args.search,
+        "blocks": blockcache.format_version,
+    }
+    if manifest.get("settings") != settings:
+        pages.clear()
+        manifest["settings"] = settings
 
+    print("Syncing static files to public directory...")
+    manifest["static"] = sync_static_files(
+        dir_path_static,
+        dir_path_public,
+        manifest.get("static", []),
+        args.checksum,
+        args.hardlink,
+        report,
+        asset_map,
+        minify_static if args.minify else None,
+    )
+    generated = {}
+    if stylesheet is not None:
+        generated[assets.asset_url("/" + highlight.stylesheet_name)] = stylesheet
+    if asset_map:
+        text = json.dumps(asset_map, indent=2, sort_keys=True) + "\n"
+        generated["/" + assets.asset_manifest_name] = text
+    manifest["generated"] = write_generated_files(
+        dir_path_public, generated, manifest.get("generated", []), report
+    )
+
+    search_index = None
+    if args.full and os.path.exists(search_path):
+        os.remove(search_path)
+    if args.search:
+        search_index = SearchIndex(dir_path_public, args.basepath, search_path)
+
+    link_index = index_outputs(dir_path_public, manifest, pages)
     print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
+    errors = generate_pages_recursive(
+        dir_path_content,
+        template_path,
+        dir_path_public,
+        args.basepath,
+        pages,
+        args.jobs,
+        report,
+        search_index,
+        link_index,
+    )
+
+    with tracing.span("link check"):
+        for link in check_links(link_index, pages):
+            report.add_broken_link(*link)
+
+    if search_index is not None:
+        print("Writing search index...")
+        with tracing.span("search index"):
+            search_index.write(dir_path_search, report)
+        search_index.save()
+        search_index.close()
+    elif os.path.exists(search_path):
+        search.remove_index(dir_path_search, search_path, report)
+
+    if encodings or manifest.get("compressed"):
+        print("Precompressing outputs...")
+    manifest["compressed"] = precompress.precompress_outputs(
+        dir_path_public,
+        manifest.get("compressed"),
+        encodings,
+        args.compress_threshold,
+        args.jobs,
+        report,
+    )
+    report.add_stats(*tracing.take_stats())
+    save_manifest(manifest_path, manifest)
+    pages.save()
+    pages.close()
+
+    build_report = report.finish(dir_path_public)
+    save_report(report_path, build_report)
+    changes = report.output_changes(dir_path_public)
+    save_changes(changes_path, changes)
+    print_report(build_report, previous_report, changes)
+    if args.trace:
+        tracing.write_trace(args.trace)
+        print(f"Wrote trace to {args.trace}")
+
+    if errors:
+        print(f"Failed to generate {len(errors)} page(s):")
+        for from_path, error in errors:
+            print(f" * {from_path}: {error}")
+        sys.exit(1)
+
+
+def minify_static(path):
+    if path.endswith(".css"):
+        return minify.minified_css(path, minify_cache_path)
+    return None
+
+
+def write_generated_files(dir_path_public, files, previous_files, report):
+    paths = []
+    for url, text in sorted(files.items()):
+        dest_path = os.path.join(dir_path_public, *url.strip("/").split("/"))
+        status = write_output(dest_path, lambda write: write(text))
+        if status != "unchanged":
+            report.add_change(dest_path, status)
+        paths.append(dest_path)
+    for dest_path in sorted(set(previous_files) - set(paths)):
+        if os.path.exists(dest_path):
+            print(f" * removing {dest_path}")
+            os.remove(dest_path)
+            report.add_change(dest_path, "removed")
+    return paths
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+legacy_keys = ("pages", "metadata")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        try:
+            manifest = json.load(f)
+        except ValueError:
+            return {}
+    for key in legacy_keys:
+        manifest.pop(key, None)
+    return manifest
+
+
+def save_manifest(path, manifest):
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+pages_schema = """
+CREATE TABLE IF NOT EXISTS pages (
+    source TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    mtime_ns INTEGER,
+    size INTEGER,
+    front_matter TEXT,
+    metadata TEXT,
+    anchors TEXT,
+    seconds REAL,
+    bytes INTEGER,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url);
+CREATE TEMP TABLE IF NOT EXISTS deferred_links (
+    source TEXT NOT NULL,
+    link TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+"""
+unseen = 0
+pending = 1
+done = 2
+
+
+class PageStore:
+    def __init__(self, path=None):
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path or ":memory:")
+        self.connection.executescript(pages_schema)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def __iter__(self):
+        cursor = self.connection.execute("SELECT source FROM pages ORDER BY source")
+        return (source for (source,) in cursor)
+
+    def __contains__(self, source):
+        return self.get(source) is not None
+
+    def get(self, source):
+        row = self.connection.execute(
+            "SELECT entry, mtime_ns, size, front_matter, metadata, seconds, bytes "
+            "FROM pages WHERE source = ?",
+            (source,),
+        ).fetchone()
+        if row is None:
+            return None
+        entry, mtime_ns, size, front_matter, metadata, seconds, size_bytes = row
+        return {
+            "entry": json.loads(entry),
+            "stamp": (mtime_ns, size),
+            "front_matter": json.loads(front_matter or "{}"),
+            "metadata": None if metadata is None else json.loads(metadata),
+            "stats": None if seconds is None else (seconds, size_bytes),
+        }
+
+    def entry(self, source):
+        page = self.get(source)
+        return None if page is None else page["entry"]
+
+    def metadata(self, source):
+        page = self.get(source)
+        return None if page is None else page["metadata"]
+
+    def begin(self):
+        self.connection.execute("UPDATE pages SET state = ?", (unseen,))
+        self.connection.execute("DELETE FROM deferred_links")
+
+    def skip(self, source, stamp, front_matter):
+        self.connection.execute(
+            "UPDATE pages SET state = ?, mtime_ns = ?, size = ?, front_matter = ? "
+            "WHERE source = ?",
+            (done, *stamp, json.dumps(front_matter), source),
+        )
+
+    def put(self, source, url, entry, stamp, front_matter):
+        self.connection.execute(
+            "INSERT INTO pages (source, url, entry, mtime_ns, size, front_matter, "
+            "state) VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (source) DO UPDATE SET "
+            "url = excluded.url, entry = excluded.entry, "
+            "mtime_ns = excluded.mtime_ns, size = excluded.size, "
+            "front_matter = excluded.front_matter, state = excluded.state",
+            (source, url, json.dumps(entry), *stamp, json.dumps(front_matter), pending),
+        )
+
+    def complete(self, source, entry, metadata, seconds, size):
+        page = self.get(source)
+        anchors = [heading["id"] for heading in metadata.get("outline", [])]
+        self.connection.execute(
+            "UPDATE pages SET entry = ?, metadata = ?, anchors = ?, seconds = ?, "
+            "bytes = ?, state = ? WHERE source = ?",
+            (
+                json.dumps(entry),
+                json.dumps(metadata),
+                json.dumps(anchors),
+                seconds,
+                size,
+                done,
+                source,
+            ),
+        )
+        return None if page is None else page["stats"]
+
+    def delete(self, source):
+        self.connection.execute("DELETE FROM pages WHERE source = ?", (source,))
+
+    def unseen(self):
+        cursor = self.connection.execute(
+            "SELECT source, entry FROM pages WHERE state = ? ORDER BY source",
+            (unseen,),
+        )
+        return [(source, json.loads(entry)) for source, entry in cursor]
+
+    def claimed(self, url):
+        row = self.connection.execute(
+            "SELECT 1 FROM pages WHERE url = ? AND state != ? LIMIT 1", (url, unseen)
+        ).fetchone()
+        return row is not None
+
+    def anchors(self, url):
+        row = self.connection.execute(
+            "SELECT anchors FROM pages WHERE url = ? AND state = ? LIMIT 1",
+            (url, done),
+        ).fetchone()
+        if row is None:
+            return None
+        return tuple(json.loads(row[0] or "[]"))
+
+    def defer_link(self, source, link, line):
+        self.connection.execute(
+            "INSERT INTO deferred_links (source, link, line) VALUES (?, ?, ?)",
+            (source, link, line),
+        )
+
+    def deferred_links(self):
+        return self.connection.execute(
+            "SELECT deferred_links.source, url, link, line FROM deferred_links "
+            "JOIN pages ON pages.source = deferred_links.source "
+            "ORDER BY deferred_links.source, deferred_links.rowid"
+        )
+
+    def clear(self):
+        self.connection.execute("DELETE FROM pages")
+
+    def save(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -1,8 +1,14 @@
 from enum import Enum
 
-from htmlnode import ParentNode
+import assets
+from blockcache import block_key, get_cache
+from highlight import highlight_code
+from htmlnode import LeafNode, ParentNode
+from images import image_props
 from inline_markdown import text_to_textnodes
+from metadata import PageMetadata, slugify, unique_anchor
 from textnode import text_node_to_html_node, TextNode, TextType
+from tracing import span
 
 
 class BlockType(Enum):
@@ -25,6 +31,33 @@ def markdown_to_blocks(markdown):
     return filtered_blocks
 
 
+def iter_blocks(lines):
+    for _, block in iter_numbered_blocks(lines):
+        yield block
+
+
+def iter_numbered_blocks(lines):
+    block_lines = []
+    start = 0
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        if line != "":
+            if not block_lines:
+                start = number
+            block_lines.append(line)
+            continue
+        if block_lines:
+            yield start, "\n".join(block_lines).strip()
+            block_lines = []
+    if block_lines:
+        yield start, "\n".join(block_lines).strip()
+
+
+def iter_typed_blocks(lines):
+    for block in iter_blocks(lines):
+        yield block, block_to_block_type(block)
+
+
 def block_to_block_type(block):
     lines = block.split("\n")
 
@@ -52,17 +85,140 @@ def block_to_block_type(block):
     return BlockType.PARAGRAPH
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def markdown_to_html_node(markdown, basepath="/"):
+    return markdown_to_page(markdown.split("\n"), basepath)[0]
+
+
+def markdown_to_page(lines, basepath="/", first_line=1):
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
+    blocks = []
+    metadata = PageMetadata()
+    for number, html_node, info in iter_page_blocks(lines, basepath):
         children.append(html_node)
-    return ParentNode("div", children, None)
+        blocks.append(info)
+        metadata.add_block(info, first_line + number - 1)
+    return ParentNode("div", children), dict(metadata.to_dict(), blocks=blocks)
+
+
+def write_markdown_html(
+    lines, write, basepath="/", blocks=None, metadata=None, first_line=1
+):
+    write("<div>")
+    for number, html_node, info in iter_page_blocks(lines, basepath):
+        with span("serialization"):
+            html_node.write_html(write)
+        if blocks is not None:
+            blocks.append(info)
+        if metadata is not None:
+            metadata.add_block(info, first_line + number - 1)
+    write("</div>")
+
+
+def iter_page_blocks(lines, basepath="/"):
+    anchors = set()
+    block_iter = iter_numbered_blocks(lines)
+    while True:
+        with span("block split"):
+            number, block = next(block_iter, (None, None))
+        if block is None:
+            return
+        with span("tree building"):
+            html_node, info = render_block(block, basepath)
+            if "id" in info:
+                anchor = unique_anchor(info["id"], anchors)
+                if anchor != info["id"]:
+                    html_node = rename_anchor(html_node, info["id"], anchor)
+                    info = dict(info, id=anchor)
+        yield number, html_node, info
+
+
+def page_title(lines):
+    for block in iter_blocks(lines):
+        if block.startswith("# "):
+            html_node = heading_to_html_node(block)
+            return block_info(html_node, BlockType.HEADING, block)["text"]
+    return None
+
 
+def rename_anchor(html_node, anchor, new_anchor):
+    if html_node.tag is None:
+        html = html_node.value.replace(f' id="{anchor}"', f' id="{new_anchor}"', 1)
+        return LeafNode(None, html)
+    html_node.props = dict(html_node.props, id=new_anchor)
+    return html_node
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+
+def block_to_html_node(block, basepath="/", block_type=None):
+    return render_block(block, basepath, block_type)[0]
+
+
+def render_block(block, basepath="/", block_type=None):
+    cache = get_cache()
+    if cache is not None:
+        key = block_key(block, basepath)
+        cached = cache.get(key)
+        if cached is not None:
+            return LeafNode(None, cached[0]), cached[1]
+    if block_type is None:
+        with span("block typing"):
+            block_type = block_to_block_type(block)
+    html_node = block_type_to_html_node(block, block_type)
+    info = block_info(html_node, block_type, block)
+    if block_type != BlockType.CODE:
+        rewrite_urls(html_node, basepath)
+    if block_type == BlockType.HEADING:
+        html_node.props = {"id": info["id"]}
+    if cache is not None:
+        html = html_node.to_html()
+        cache.put(key, (html, info))
+        return LeafNode(None, html), info
+    return html_node, info
+
+
+def block_info(html_node, block_type, block):
+    info = {"type": block_type.value, "text": ""}
+    if block_type != BlockType.CODE:
+        parts = []
+        links = []
+        images = []
+        collect_text(html_node, parts, links, images)
+        info["text"] = "".join(parts).strip()
+        if links:
+            info["links"] = url_lines(block, links)
+        if images:
+            info["images"] = url_lines(block, images)
+    if block_type == BlockType.HEADING:
+        info["level"] = int(html_node.tag[1])
+        info["id"] = slugify(info["text"])
+    return info
+
+
+def url_lines(block, urls):
+    located = []
+    pos = 0
+    for url in urls:
+        index = block.find(f"]({url})", pos)
+        if index != -1:
+            pos = index + 1
+        located.append([url, block.count("\n", 0, pos)])
+    return located
+
+
+def collect_text(html_node, parts, links, images):
+    if html_node.children is not None:
+        for child in html_node.children:
+            collect_text(child, parts, links, images)
+        if html_node.tag == "li":
+            parts.append(" ")
+    elif html_node.tag == "img":
+        images.append(html_node.props["src"])
+    else:
+        if html_node.tag == "a":
+            links.append(html_node.props["href"])
+        parts.append(html_node.value)
+
+
+def block_type_to_html_node(block, block_type):
     if block_type == BlockType.PARAGRAPH:
         return paragraph_to_html_node(block)
     if block_type == BlockType.HEADING:
@@ -78,8 +234,30 @@ def block_to_html_node(block):
     raise ValueError("invalid block type")
 
 
+def rewrite_urls(html_node, basepath, fingerprinted=None):
+    if fingerprinted is None:
+        fingerprinted = assets.version() != ""
+    if html_node.props is not None:
+        if html_node.tag == "img":
+            html_node.props = image_props(html_node.props)
+        if basepath != "/" or fingerprinted:
+            rewrite_root_urls(html_node, basepath)
+    if html_node.children is not None:
+        for child in html_node.children:
+            rewrite_urls(child, basepath, fingerprinted)
+
+
+def rewrite_root_urls(html_node, basepath):
+    for name in ("href", "src"):
+        url = html_node.props.get(name)
+        if url is not None and url.startswith("/"):
+            html_node.props = dict(html_node.props)
+            html_node.props[name] = basepath + assets.asset_url(url)[1:]
+
+
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+    with span("inline parsing"):
+        text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
         html_node = text_node_to_html_node(text_node)
@@ -111,10 +289,19 @@ def heading_to_html_node(block):
 def code_to_html_node(block):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
-    text = block[4:-3]
+    header = block.split("\n", 1)[0]
+    language = header[3:].strip()
+    text = block[len(header) + 1 : -3]
+    props = None
+    if language != "":
+        props = {"class": f"language-{language}"}
+        highlighted = highlight_code(text, language)
+        if highlighted is not None:
+            code = ParentNode("code", [LeafNode(None, highlighted)], props)
+            return ParentNode("pre", [code], {"class": "highlight"})
     raw_text_node = TextNode(text, TextType.TEXT)
     child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
+    code = ParentNode("code", [child], props)
     return ParentNode("pre", [code])
 
 
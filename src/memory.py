@@ -0,0 +1,54 @@
+import tracemalloc
+
+
+process_allowance = 32 * 1024 * 1024
+page_allowance = 1024 * 1024
+
+_budget = None
+
+
+def configure(budget=None):
+    global _budget
+    _budget = budget
+
+
+def budget():
+    return _budget
+
+
+def limit_jobs(jobs):
+    if _budget is None:
+        return jobs
+    return max(1, min(jobs, _budget // process_allowance - 1))
+
+
+def limit_queue_depth(queue_depth):
+    if _budget is None:
+        return queue_depth
+    return max(1, min(queue_depth, _budget // 8 // page_allowance))
+
+
+def limit_cache_bytes(max_bytes, processes):
+    if _budget is None:
+        return max_bytes
+    return min(max_bytes, _budget // 8 // processes)
+
+
+def start_tracemalloc():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def tracemalloc_stats(top=5):
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    return {
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "top": [
+            {"location": str(stat.traceback), "bytes": stat.size}
+            for stat in snapshot.statistics("lineno")[:top]
+        ],
+    }
@@ -0,0 +1,71 @@
+import math
+import re
+
+
+words_per_minute = 200
+summary_length = 300
+
+anchor_pattern = re.compile(r"[^\w\- ]")
+separator_pattern = re.compile(r"[\s\-]+")
+word_pattern = re.compile(r"\S*\w\S*")
+
+
+def slugify(text):
+    slug = separator_pattern.sub("-", anchor_pattern.sub("", text.lower())).strip("-")
+    return slug or "section"
+
+
+def unique_anchor(anchor, anchors):
+    candidate = anchor
+    n = 1
+    while candidate in anchors:
+        candidate = f"{anchor}-{n}"
+        n += 1
+    anchors.add(candidate)
+    return candidate
+
+
+def summarize(text, length=summary_length):
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    if cut <= 0:
+        cut = length
+    return text[:cut].rstrip() + "..."
+
+
+class PageMetadata:
+    def __init__(self):
+        self.title = None
+        self.outline = []
+        self.words = 0
+        self.summary = None
+        self.links = []
+        self.images = []
+
+    def add_block(self, info, line=1):
+        text = info["text"]
+        self.words += len(word_pattern.findall(text))
+        if info["type"] == "heading":
+            if self.title is None and info["level"] == 1:
+                self.title = text
+            self.outline.append(
+                {"level": info["level"], "text": text, "id": info["id"]}
+            )
+        elif info["type"] == "paragraph" and self.summary is None and text:
+            self.summary = summarize(text)
+        for url, offset in info.get("links", ()):
+            self.links.append([url, line + offset])
+        for url, offset in info.get("images", ()):
+            self.images.append([url, line + offset])
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "outline": self.outline,
+            "words": self.words,
+            "reading_minutes": math.ceil(self.words / words_per_minute),
+            "summary": self.summary,
+            "links": self.links,
+            "images": self.images,
+        }
@@ -0,0 +1,141 @@
+import hashlib
+import re
+
+from diskcache import read_entry, write_entry
+from tracing import count
+
+
+tag_pattern = re.compile(r"(<!--.*?-->|<[^>]*>)", re.DOTALL)
+tag_name_pattern = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)")
+whitespace_pattern = re.compile(r"\s+")
+raw_tags = ("pre", "textarea", "script", "style")
+block_tags = frozenset(
+    """
+    address article aside base blockquote body dd details dialog div dl dt
+    fieldset figcaption figure footer form h1 h2 h3 h4 h5 h6 head header hgroup
+    hr html li link main meta nav ol p pre section summary table tbody td tfoot
+    th thead title tr ul
+    """.split()
+)
+css_token_pattern = re.compile(
+    r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|\s*;\s*(\})\s*"
+    r"|\s*([{};,>])\s*|:\s+|(\s+)",
+    re.DOTALL,
+)
+format_version = 1
+
+_enabled = False
+
+
+def configure(enabled=False):
+    global _enabled
+    _enabled = enabled
+
+
+def settings():
+    return (_enabled,)
+
+
+def enabled():
+    return _enabled
+
+
+class HtmlMinifier:
+    def __init__(self, write, buffer_size=1 << 16):
+        self.output = write
+        self.buffer_size = buffer_size
+        self.chunks = []
+        self.size = 0
+        self.raw_tag = None
+        self.block_tag = True
+        self.space = False
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        text = "".join(self.chunks)
+        end = text.rfind(">") + 1
+        comment = text.rfind("<!--", 0, end)
+        if comment != -1 and text.find("-->", comment + 4) == -1:
+            end = text.rfind(">", 0, comment) + 1
+        pending = text[end:]
+        self.chunks = [pending] if pending else []
+        self.size = len(pending)
+        self.minify(text[:end])
+
+    def close(self):
+        self.flush()
+        self.minify("".join(self.chunks))
+        self.chunks = []
+        self.size = 0
+
+    def minify(self, text):
+        write = self.output
+        tokens = tag_pattern.split(text)
+        for i in range(len(tokens)):
+            token = tokens[i]
+            if token == "":
+                continue
+            if i % 2 == 0:
+                if self.raw_tag is not None:
+                    write(token)
+                elif token.isspace():
+                    self.space = True
+                else:
+                    write(whitespace_pattern.sub(" ", token))
+                    self.block_tag = False
+                continue
+            if self.raw_tag is not None:
+                write(token)
+                match = tag_name_pattern.match(token)
+                if match and match[1] and match[2].lower() == self.raw_tag:
+                    self.raw_tag = None
+                continue
+            if token.startswith("<!--") and not token.startswith("<!--["):
+                continue
+            match = tag_name_pattern.match(token)
+            block_tag = match is None or match[2].lower() in block_tags
+            if self.space and not (self.block_tag and block_tag):
+                write(" ")
+            self.space = False
+            self.block_tag = block_tag
+            write(token)
+            if match and not match[1] and match[2].lower() in raw_tags:
+                self.raw_tag = match[2].lower()
+
+
+def minify_css(text):
+    def replace(match):
+        if match[1] is not None:
+            return match[1]
+        if match[2] is not None:
+            return ""
+        if match[3] is not None:
+            return match[3]
+        if match[4] is not None:
+            return match[4]
+        if match[5] is not None:
+            return " "
+        return ":"
+
+    return css_token_pattern.sub(replace, text).strip()
+
+
+def minified_css(path, cache_dir_path=None):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    key = hashlib.sha256(f"{format_version}\0{text}".encode("utf-8")).hexdigest()
+    if cache_dir_path is not None:
+        cached = read_entry(cache_dir_path, key, ".css")
+        if cached is not None:
+            count("minify.hit")
+            return cached
+    count("minify.miss")
+    minified = minify_css(text)
+    if cache_dir_path is not None:
+        write_entry(cache_dir_path, key, minified, ".css")
+    return minified
@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+import tracing
+
+
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def write_output(dest_path, render, binary=False):
+    dir_path = os.path.dirname(dest_path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=".", suffix=".tmp")
+    if binary:
+        f = os.fdopen(fd, "wb")
+    else:
+        f = os.fdopen(fd, "w", encoding="utf-8")
+    try:
+        with f:
+            render(f.write)
+            with tracing.span("flush/replace"):
+                f.flush()
+        with tracing.span("flush/replace"):
+            return replace_if_changed(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_empty_dirs(dir_path, root_path):
+    root = os.path.abspath(root_path)
+    dir_path = os.path.abspath(dir_path)
+    while dir_path.startswith(root + os.sep) and os.path.isdir(dir_path):
+        if os.listdir(dir_path):
+            break
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
+
+
+def replace_if_changed(tmp_path, dest_path):
+    if not os.path.lexists(dest_path):
+        status = "added"
+    elif same_contents(tmp_path, dest_path):
+        os.remove(tmp_path)
+        tracing.count("output.hit")
+        return "unchanged"
+    else:
+        status = "changed"
+    os.chmod(tmp_path, 0o666 & ~_umask)
+    os.replace(tmp_path, dest_path)
+    tracing.count("output.miss")
+    return status
+
+
+def same_contents(path_a, path_b, chunk_size=1 << 16):
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        with open(path_a, "rb") as file_a, open(path_b, "rb") as file_b:
+            while True:
+                chunk = file_a.read(chunk_size)
+                if chunk != file_b.read(chunk_size):
+                    return False
+                if not chunk:
+                    return True
+    except OSError:
+        return False
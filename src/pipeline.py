@@ -0,0 +1,74 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+
+default_io_threads = 2
+default_queue_depth = 8
+max_chunksize = 16
+max_buffered_bytes = 256 * 1024
+
+_io_threads = 0
+_queue_depth = default_queue_depth
+
+
+def configure(io_threads=0, queue_depth=default_queue_depth):
+    global _io_threads, _queue_depth
+    _io_threads = io_threads
+    _queue_depth = max(1, queue_depth)
+
+
+def settings():
+    return _io_threads, _queue_depth
+
+
+def enabled():
+    return _io_threads > 0
+
+
+def imap(executor, fn, items, chunksize=1, limit=1):
+    items = iter(items)
+    pending = deque()
+
+    def submit():
+        while len(pending) < limit:
+            chunk = list(islice(items, chunksize))
+            if not chunk:
+                return
+            pending.append(executor.submit(map_chunk, fn, chunk))
+
+    submit()
+    while pending:
+        results = pending.popleft().result()
+        submit()
+        yield from results
+
+
+def map_chunk(fn, chunk):
+    return [fn(item) for item in chunk]
+
+
+def run(items, read, process, write, io_threads=None, queue_depth=None):
+    io_threads = io_threads or _io_threads or 1
+    queue_depth = queue_depth or _queue_depth
+    items = iter(items)
+    reads = deque()
+    writes = deque()
+    readers = ThreadPoolExecutor(io_threads, "reader")
+    writers = ThreadPoolExecutor(io_threads, "writer")
+
+    def prefetch():
+        for item in islice(items, queue_depth - len(reads)):
+            reads.append((item, readers.submit(read, item)))
+
+    with readers, writers:
+        prefetch()
+        while reads:
+            item, source = reads.popleft()
+            prefetch()
+            output = process(item, source.result())
+            writes.append(writers.submit(write, item, output))
+            while len(writes) > queue_depth:
+                yield writes.popleft().result()
+        while writes:
+            yield writes.popleft().result()
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from output import write_output
+from tracing import span
+
+
+compressible_extensions = (
+    ".html",
+    ".css",
+    ".js",
+    ".json",
+    ".svg",
+    ".txt",
+    ".xml",
+)
+encoding_suffixes = {"gzip": ".gz", "deflate": ".zz"}
+default_threshold = 1024
+
+
+def compress(data, encoding):
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(data, 9)
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+
+def precompress_outputs(
+    dir_path_public,
+    previous=None,
+    encodings=("gzip",),
+    threshold=default_threshold,
+    jobs=1,
+    report=None,
+):
+    previous = previous or {}
+    paths = []
+    if encodings:
+        paths = find_compressible(dir_path_public, threshold)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = list(
+            executor.map(
+                lambda path: precompress_file(path, previous.get(path), encodings),
+                paths,
+            )
+        )
+
+    entries = {}
+    for path, entry, outcomes in results:
+        entries[path] = entry
+        for encoding, (size, compressed_size, status) in outcomes.items():
+            sibling_path = path + encoding_suffixes[encoding]
+            if report is not None:
+                report.add_compression(path, encoding, size, compressed_size, status)
+                if status in ("added", "changed"):
+                    report.add_change(sibling_path, status)
+
+    for path, entry in sorted(previous.items()):
+        kept = entries[path]["encodings"] if path in entries else []
+        for encoding in entry["encodings"]:
+            sibling_path = path + encoding_suffixes[encoding]
+            if encoding not in kept and os.path.exists(sibling_path):
+                print(f" * removing {sibling_path}")
+                os.remove(sibling_path)
+                if report is not None:
+                    report.add_change(sibling_path, "removed")
+    return entries
+
+
+def find_compressible(dir_path, threshold):
+    paths = []
+    for root, _, filenames in os.walk(dir_path):
+        for filename in sorted(filenames):
+            if not filename.endswith(compressible_extensions):
+                continue
+            path = os.path.join(root, filename)
+            if os.path.getsize(path) >= max(threshold, 1):
+                paths.append(path)
+    return sorted(paths)
+
+
+def precompress_file(path, previous_entry, encodings):
+    with open(path, "rb") as f:
+        data = f.read()
+    entry = {
+        "hash": hashlib.sha256(data).hexdigest(),
+        "encodings": sorted(encodings),
+    }
+    outcomes = {}
+    for encoding in entry["encodings"]:
+        sibling_path = path + encoding_suffixes[encoding]
+        if entry == previous_entry and os.path.exists(sibling_path):
+            size = os.path.getsize(sibling_path)
+            outcomes[encoding] = (len(data), size, None)
+            continue
+        with span("compress", source=path, encoding=encoding):
+            body = compress(data, encoding)
+        status = write_output(sibling_path, lambda write: write(body), binary=True)
+        outcomes[encoding] = (len(data), len(body), status)
+    return path, entry, outcomes
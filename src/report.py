@@ -0,0 +1,269 @@
+import heapq
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import memory
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class BuildReport:
+    def __init__(self, top=10):
+        self.start = time.perf_counter()
+        self.top = top
+        self.pages_total = 0
+        self.pages_rendered = 0
+        self.slowest_pages = []
+        self.largest_pages = []
+        self.regressions = []
+        self.static_files = 0
+        self.static_copied = 0
+        self.static_seconds = 0.0
+        self.stage_times = {}
+        self.counters = {}
+        self.changes = {"added": [], "changed": [], "removed": []}
+        self.compression = {}
+        self.broken_links = []
+
+    def add_page(self, stats, previous=None):
+        page = {key: stats[key] for key in ("source", "seconds", "bytes")}
+        self.pages_total += 1
+        self.pages_rendered += 1
+        self.rank(self.slowest_pages, page["seconds"], page)
+        self.rank(self.largest_pages, page["bytes"], page)
+        if previous is not None:
+            self.regressions.extend(page_regressions(page, *previous))
+        self.add_stats(stats["stages"], stats["counters"])
+        self.count("incremental.miss")
+        if stats.get("status") in self.changes:
+            self.add_change(stats["dest"], stats["status"])
+
+    def skip_page(self, from_path, previous=None):
+        self.count("incremental.hit")
+        self.pages_total += 1
+        if previous is not None:
+            seconds, size = previous
+            page = {"source": from_path, "seconds": seconds, "bytes": size}
+            self.rank(self.largest_pages, size, page)
+
+    def rank(self, pages, key, page):
+        item = (key, page["source"], self.pages_total, page)
+        if len(pages) < self.top:
+            heapq.heappush(pages, item)
+        elif item[:3] > pages[0][:3]:
+            heapq.heapreplace(pages, item)
+
+    def add_static(self, copied, seconds=0.0):
+        self.static_files += 1
+        if copied:
+            self.static_copied += 1
+            self.static_seconds += seconds
+            self.count("static.miss")
+        else:
+            self.count("static.hit")
+
+    def add_change(self, path, status):
+        self.changes[status].append(str(path))
+
+    def output_changes(self, dir_path_public):
+        return {
+            status: sorted(
+                "/" + Path(os.path.relpath(path, dir_path_public)).as_posix()
+                for path in paths
+            )
+            for status, paths in self.changes.items()
+        }
+
+    def add_broken_link(self, source, line, url, reason):
+        self.broken_links.append(
+            {"source": source, "line": line, "url": url, "reason": reason}
+        )
+
+    def add_compression(self, path, encoding, size, compressed_size, status):
+        self.count("compress.hit" if status is None else "compress.miss")
+        extension = os.path.splitext(path)[1]
+        encodings = self.compression.setdefault(extension, {})
+        entry = encodings.setdefault(
+            encoding, {"files": 0, "bytes": 0, "compressed_bytes": 0}
+        )
+        entry["files"] += 1
+        entry["bytes"] += size
+        entry["compressed_bytes"] += compressed_size
+
+    def add_stats(self, stage_times, counters):
+        for name, seconds in stage_times.items():
+            self.stage_times[name] = self.stage_times.get(name, 0.0) + seconds
+        for name, n in counters.items():
+            self.count(name, n)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def finish(self, dir_path_public):
+        seconds = time.perf_counter() - self.start
+        stages = dict(self.stage_times)
+        if self.static_copied:
+            stages["static copy"] = self.static_seconds
+        return {
+            "timestamp": time.time(),
+            "seconds": seconds,
+            "pages_total": self.pages_total,
+            "pages_rendered": self.pages_rendered,
+            "pages_per_second": self.pages_rendered / seconds if seconds > 0 else None,
+            "static_files": self.static_files,
+            "static_copied": self.static_copied,
+            "output_bytes": directory_size(dir_path_public),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "memory_budget_bytes": memory.budget(),
+            "tracemalloc": memory.tracemalloc_stats(),
+            "stages": stages,
+            "caches": cache_rates(self.counters),
+            "compression": compression_ratios(self.compression),
+            "broken_links": self.broken_links,
+            "regressions": [
+                {"kind": kind, "source": source, "before": before, "after": after}
+                for kind, source, before, after in self.regressions
+            ],
+            "slowest_pages": ranked(self.slowest_pages),
+            "largest_pages": ranked(self.largest_pages),
+        }
+
+
+def ranked(pages):
+    return [page for *_, page in sorted(pages, reverse=True)]
+
+
+def cache_rates(counters):
+    caches = {}
+    for name, n in counters.items():
+        cache, _, outcome = name.rpartition(".")
+        if outcome not in ("hit", "miss", "evict"):
+            continue
+        entry = caches.setdefault(cache, {"hits": 0, "misses": 0, "evictions": 0})
+        entry[{"hit": "hits", "miss": "misses", "evict": "evictions"}[outcome]] += n
+    for entry in caches.values():
+        lookups = entry["hits"] + entry["misses"]
+        entry["hit_rate"] = entry["hits"] / lookups if lookups else None
+    return caches
+
+
+def compression_ratios(compression):
+    return {
+        extension: {
+            encoding: dict(entry, ratio=entry["compressed_bytes"] / entry["bytes"])
+            for encoding, entry in encodings.items()
+        }
+        for extension, encodings in sorted(compression.items())
+    }
+
+
+def directory_size(dir_path):
+    total = 0
+    for root, _, filenames in os.walk(dir_path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(root, filename))
+    return total
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return max(own, children)
+
+
+def page_regressions(page, seconds, size, time_threshold=0.5, size_threshold=0.1):
+    regressions = []
+    if grew(seconds, page["seconds"], time_threshold, 0.005):
+        regressions.append(("time", page["source"], seconds, page["seconds"]))
+    if grew(size, page["bytes"], size_threshold, 0):
+        regressions.append(("size", page["source"], size, page["bytes"]))
+    return regressions
+
+
+def grew(before, after, threshold, minimum):
+    return after > minimum and after > before * (1 + threshold)
+
+
+def load_report(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return None
+
+
+def save_changes(path, changes):
+    with open(path, "w") as f:
+        json.dump(changes, f, indent=2)
+
+
+def save_report(path, report):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def print_report(report, previous=None, changes=None):
+    print(
+        f"Built {report['pages_rendered']}/{report['pages_total']} page(s) and "
+        f"copied {report['static_copied']}/{report['static_files']} static file(s) "
+        f"in {report['seconds']:.2f} s"
+    )
+    if report["pages_per_second"]:
+        print(f" * {report['pages_per_second']:.1f} pages/s")
+    print(f" * {report['output_bytes']} output bytes")
+    if report["peak_rss_bytes"]:
+        print(f" * peak RSS {report['peak_rss_bytes'] / 1048576:.1f} MiB")
+    if report.get("tracemalloc"):
+        print(
+            " * peak traced allocations "
+            f"{report['tracemalloc']['peak_bytes'] / 1048576:.1f} MiB"
+        )
+    for name, seconds in sorted(report["stages"].items(), key=lambda item: -item[1]):
+        print(f" * {name}: {seconds * 1000:.1f} ms")
+    for name, cache in sorted(report["caches"].items()):
+        if cache["hit_rate"] is not None:
+            line = f" * {name} cache: {cache['hit_rate']:.0%} hits"
+            if cache["evictions"]:
+                line += f", {cache['evictions']} evictions"
+            print(line)
+    for extension, encodings in report.get("compression", {}).items():
+        for encoding, entry in sorted(encodings.items()):
+            print(
+                f" * {extension} {encoding}: {entry['files']} file(s) "
+                f"compressed to {entry['ratio']:.1%}"
+            )
+    if changes is not None:
+        print(
+            f" * {len(changes['added'])} output(s) added, "
+            f"{len(changes['changed'])} changed, {len(changes['removed'])} removed"
+        )
+    if previous is not None:
+        change = report["seconds"] - previous["seconds"]
+        print(f" * {change:+.2f} s compared to the previous build")
+    for link in report.get("broken_links", []):
+        print(
+            f" ! {link['source']}:{link['line']}: broken link {link['url']} "
+            f"({link['reason']})"
+        )
+    budget = report.get("memory_budget_bytes")
+    if budget and report["peak_rss_bytes"] and report["peak_rss_bytes"] > budget:
+        print(
+            f" ! peak RSS {report['peak_rss_bytes'] / 1048576:.1f} MiB exceeded "
+            f"the memory budget of {budget / 1048576:.1f} MiB"
+        )
+    for regression in report["regressions"]:
+        print(
+            f" ! {regression['source']}: {regression['kind']} grew from "
+            f"{regression['before']:g} to {regression['after']:g}"
+        )
@@ -0,0 +1,267 @@
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+from output import write_output
+
+
+token_pattern = re.compile(r"\w+")
+prefix_length = 2
+title_weight = 10
+heading_weight = 3
+compact_ratio = 0.25
+index_name = "index.json"
+documents_name = "docs.json"
+
+_enabled = False
+
+
+def configure(enabled=False):
+    global _enabled
+    _enabled = enabled
+
+
+def settings():
+    return (_enabled,)
+
+
+def enabled():
+    return _enabled
+
+
+def page_terms(title, blocks):
+    terms = {}
+    add_terms(terms, title, title_weight)
+    for block in blocks:
+        weight = heading_weight if block["type"] == "heading" else 1
+        add_terms(terms, block["text"], weight)
+    return terms
+
+
+def add_terms(terms, text, weight):
+    for term in token_pattern.findall(text.lower()):
+        terms[term] = terms.get(term, 0) + weight
+
+
+def shard_name(term):
+    prefix = term[:prefix_length]
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return "_" + prefix.encode("utf-8").hex()
+
+
+def page_url(dest_path, dir_path_public, basepath):
+    url = Path(os.path.relpath(dest_path, dir_path_public)).as_posix()
+    if url == "index.html" or url.endswith("/index.html"):
+        url = url[: -len("index.html")]
+    return basepath + url
+
+
+search_schema = """
+CREATE TABLE IF NOT EXISTS documents (
+    source TEXT PRIMARY KEY,
+    doc_id INTEGER NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc_id ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS free_ids (doc_id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS shards (name TEXT PRIMARY KEY);
+"""
+
+
+class SearchIndex:
+    def __init__(self, dir_path_public, basepath="/", path=None):
+        self.dir_path_public = dir_path_public
+        self.basepath = basepath
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path or ":memory:")
+        self.connection.executescript(search_schema)
+
+    def query(self, sql, *args):
+        return self.connection.execute(sql, args).fetchone()[0]
+
+    def doc_id(self, source):
+        row = self.connection.execute(
+            "SELECT doc_id FROM documents WHERE source = ?", (source,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def next_id(self):
+        return self.query("SELECT COUNT(*) FROM documents") + self.query(
+            "SELECT COUNT(*) FROM free_ids"
+        )
+
+    def add_page(self, source, dest_path, document):
+        doc_id = self.doc_id(source)
+        if doc_id is not None:
+            self.connection.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        else:
+            doc_id = self.query("SELECT MIN(doc_id) FROM free_ids")
+            if doc_id is None:
+                doc_id = self.next_id()
+            self.connection.execute("DELETE FROM free_ids WHERE doc_id = ?", (doc_id,))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO documents (source, doc_id, url, title) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                source,
+                doc_id,
+                page_url(dest_path, self.dir_path_public, self.basepath),
+                document["title"],
+            ),
+        )
+        self.connection.executemany(
+            "INSERT INTO postings (term, doc_id, weight) VALUES (?, ?, ?)",
+            ((term, doc_id, weight) for term, weight in document["terms"].items()),
+        )
+
+    def remove_page(self, source):
+        doc_id = self.doc_id(source)
+        if doc_id is None:
+            return
+        self.connection.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.connection.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        self.connection.execute("INSERT INTO free_ids (doc_id) VALUES (?)", (doc_id,))
+
+    def ids(self):
+        cursor = self.connection.execute("SELECT source, doc_id FROM documents")
+        return dict(cursor)
+
+    def compact(self):
+        free = self.query("SELECT COUNT(*) FROM free_ids")
+        if free <= compact_ratio * self.next_id():
+            return
+        self.connection.executescript(
+            """
+            CREATE TEMP TABLE renumbered AS
+                SELECT doc_id AS old_id, ROW_NUMBER() OVER (ORDER BY doc_id) AS new_id
+                FROM documents;
+            UPDATE documents SET doc_id = -(
+                SELECT new_id FROM renumbered WHERE old_id = documents.doc_id
+            );
+            UPDATE documents SET doc_id = -doc_id - 1;
+            UPDATE postings SET doc_id = -(
+                SELECT new_id FROM renumbered WHERE old_id = postings.doc_id
+            );
+            UPDATE postings SET doc_id = -doc_id - 1;
+            DROP TABLE renumbered;
+            DELETE FROM free_ids;
+            """
+        )
+
+    def documents(self):
+        cursor = self.connection.execute(
+            "SELECT doc_id, url, title FROM documents ORDER BY doc_id"
+        )
+        doc_id = 0
+        for next_doc_id, url, title in cursor:
+            for doc_id in range(doc_id, next_doc_id):
+                yield None
+            yield [url, title]
+            doc_id = next_doc_id + 1
+        for doc_id in range(doc_id, self.next_id()):
+            yield None
+
+    def shards(self):
+        cursor = self.connection.execute(
+            "SELECT term, doc_id, weight FROM postings ORDER BY term, doc_id"
+        )
+        name = None
+        shard = {}
+        previous = 0
+        for term, doc_id, weight in cursor:
+            if term not in shard:
+                if shard_name(term) != name:
+                    if shard:
+                        yield name, shard
+                    name = shard_name(term)
+                    shard = {}
+                shard[term] = [[], []]
+                previous = 0
+            deltas, weights = shard[term]
+            deltas.append(doc_id - previous)
+            weights.append(weight)
+            previous = doc_id
+        if shard:
+            yield name, shard
+
+    def build(self):
+        return list(self.documents()), dict(self.shards())
+
+    def write(self, dir_path, report=None):
+        self.compact()
+        os.makedirs(dir_path, exist_ok=True)
+        names = []
+        for name, shard in self.shards():
+            write_json(os.path.join(dir_path, name + ".json"), shard, report)
+            names.append(name)
+
+        def write_documents(write):
+            write("[")
+            for doc_id, document in enumerate(self.documents()):
+                if doc_id:
+                    write(",")
+                write(json.dumps(document, ensure_ascii=False, separators=(",", ":")))
+            write("]")
+
+        write_file(os.path.join(dir_path, documents_name), write_documents, report)
+        index = {"prefix_length": prefix_length, "shards": sorted(names)}
+        write_json(os.path.join(dir_path, index_name), index, report)
+        for name in sorted(set(self.shard_names()) - set(names)):
+            remove_file(os.path.join(dir_path, name + ".json"), report)
+        self.connection.execute("DELETE FROM shards")
+        self.connection.executemany(
+            "INSERT INTO shards (name) VALUES (?)", ((name,) for name in names)
+        )
+
+    def shard_names(self):
+        cursor = self.connection.execute("SELECT name FROM shards ORDER BY name")
+        return [name for (name,) in cursor]
+
+    def save(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def write_json(path, data, report=None):
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    write_file(path, lambda write: write(text), report)
+
+
+def write_file(path, render, report=None):
+    status = write_output(path, render)
+    if report is not None and status != "unchanged":
+        report.add_change(path, status)
+
+
+def remove_index(dir_path, path, report=None):
+    index = SearchIndex(None, path=path)
+    names = [index_name, documents_name]
+    names.extend(name + ".json" for name in index.shard_names())
+    index.close()
+    for name in names:
+        remove_file(os.path.join(dir_path, name), report)
+    if os.path.isdir(dir_path) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+    os.remove(path)
+
+
+def remove_file(path, report):
+    if os.path.exists(path):
+        print(f" * removing {path}")
+        os.remove(path)
+        if report is not None:
+            report.add_change(path, "removed")
+
@@ -0,0 +1,302 @@
+import argparse
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import blockcache
+import frontmatter
+import highlight
+import images
+from gencontent import find_pages, page_template, render_page
+
+
+livereload_path = "/__livereload"
+livereload_script = (
+    "<script>new EventSource("
+    f'"{livereload_path}"'
+    ").onmessage = function () { location.reload(); };</script>"
+)
+
+
+class SiteCache:
+    def __init__(
+        self, dir_path_content, dir_path_static, template_path, livereload=False
+    ):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.livereload = livereload
+        self.outputs = {}
+        self.sources = {}
+        self.dependencies = {}
+        self.page_images = {}
+        self.front_matter = {}
+        self.snapshot = {}
+        self.version = 0
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+
+    def start(self):
+        with self.lock:
+            images.configure(images.build_index(self.dir_path_static))
+            self.snapshot = self.scan()
+            self.build_graph()
+            for url, (kind, _) in self.sources.items():
+                if kind == "page":
+                    self.render(url)
+
+    def scan(self):
+        snapshot = {}
+        dir_path_layouts = os.path.join(os.path.dirname(self.template_path), "layouts")
+        for dir_path in (self.dir_path_content, self.dir_path_static, dir_path_layouts):
+            for root, _, filenames in os.walk(dir_path):
+                for filename in filenames:
+                    path = os.path.join(root, filename)
+                    stat = os.stat(path)
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        stat = os.stat(self.template_path)
+        snapshot[self.template_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def build_graph(self):
+        self.sources = {}
+        self.dependencies = {self.template_path: set()}
+        self.front_matter = frontmatter.scan_front_matter(self.dir_path_content)
+        for from_path, dest_path in find_pages(self.dir_path_content, "/"):
+            page_front_matter = self.front_matter.get(
+                frontmatter.content_url(from_path, self.dir_path_content), {}
+            )
+            if not frontmatter.is_published(page_front_matter):
+                continue
+            url = Path(dest_path).as_posix()
+            self.sources[url] = ("page", from_path)
+            self.dependencies[from_path] = {url}
+            layout_path = page_template(self.template_path, page_front_matter)
+            self.dependencies.setdefault(layout_path, set()).add(url)
+        for root, _, filenames in os.walk(self.dir_path_static):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                relative_path = os.path.relpath(path, self.dir_path_static)
+                url = "/" + Path(relative_path).as_posix()
+                self.sources[url] = ("static", path)
+                self.dependencies[path] = {url}
+        if highlight.stylesheet() is not None:
+            self.sources["/" + highlight.stylesheet_name] = ("stylesheet", None)
+
+    def front_matter_changed(self, path):
+        url = frontmatter.content_url(path, self.dir_path_content)
+        if url.startswith("/..") or not url.endswith(frontmatter.content_extensions):
+            return False
+        return frontmatter.read_front_matter(path) != self.front_matter.get(url, {})
+
+    def refresh(self):
+        with self.lock:
+            start = time.perf_counter()
+            snapshot = self.scan()
+            changed_paths = set(snapshot) ^ set(self.snapshot)
+            for path, stamp in snapshot.items():
+                if self.snapshot.get(path, stamp) != stamp:
+                    changed_paths.add(path)
+            if not changed_paths:
+                return []
+
+            affected = set()
+            for path in changed_paths:
+                affected.update(self.dependencies.get(path, ()))
+            image_paths = [
+                path
+                for path in changed_paths
+                if path.lower().endswith(images.image_extensions)
+            ]
+            if image_paths:
+                (previous,) = images.settings()
+                images.configure(images.build_index(self.dir_path_static))
+                (current,) = images.settings()
+                resized = set(
+                    image_url
+                    for image_url in set(previous) | set(current)
+                    if previous.get(image_url) != current.get(image_url)
+                )
+                affected.update(
+                    url
+                    for url, image_urls in self.page_images.items()
+                    if not image_urls.isdisjoint(resized)
+                )
+            if set(snapshot) != set(self.snapshot) or any(
+                self.front_matter_changed(path) for path in changed_paths
+            ):
+                self.build_graph()
+                for path in changed_paths:
+                    affected.update(self.dependencies.get(path, ()))
+            self.snapshot = snapshot
+
+            for url in sorted(affected):
+                self.outputs.pop(url, None)
+                if url in self.sources and self.sources[url][0] == "page":
+                    self.render(url)
+            self.version += 1
+            self.changed.notify_all()
+
+            elapsed = (time.perf_counter() - start) * 1000
+            for path in sorted(changed_paths):
+                print(f" * changed {path}")
+            print(f"Rebuilt {len(affected)} output(s) in {elapsed:.1f} ms")
+            return sorted(affected)
+
+    def render(self, url):
+        kind, path = self.sources[url]
+        status = 200
+        if kind == "page":
+            content_type = "text/html; charset=utf-8"
+            chunks = []
+            try:
+                page = render_page(path, self.template_path, "/", chunks.append)
+                html = "".join(chunks)
+                self.page_images[url] = set(
+                    image_url for image_url, _ in page["images"]
+                )
+            except Exception as e:
+                status = 500
+                html = f"<pre>{path}: {type(e).__name__}: {e}</pre>"
+                print(f" * {path}: {type(e).__name__}: {e}")
+            if self.livereload:
+                html = inject_livereload(html)
+            body = html.encode("utf-8")
+        elif kind == "stylesheet":
+            content_type = "text/css; charset=utf-8"
+            body = highlight.stylesheet().encode("utf-8")
+        else:
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            with open(path, "rb") as f:
+                body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.outputs[url] = (status, body, etag, content_type)
+        return self.outputs[url]
+
+    def resolve(self, url):
+        url = url.split("?", 1)[0].split("#", 1)[0]
+        for candidate in (url, url.rstrip("/") + "/index.html", url + ".html"):
+            if candidate in self.sources:
+                return candidate
+        return None
+
+    def get(self, url):
+        with self.lock:
+            url = self.resolve(url)
+            if url is None:
+                return None
+            if url in self.outputs:
+                return self.outputs[url]
+            return self.render(url)
+
+    def wait_for_change(self, version, timeout):
+        with self.lock:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+def inject_livereload(html):
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + livereload_script
+    return html[:index] + livereload_script + html[index:]
+
+
+def make_handler(site):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == livereload_path:
+                self.send_events()
+                return
+            self.send_output(True)
+
+        def do_HEAD(self):
+            self.send_output(False)
+
+        def send_output(self, include_body):
+            output = site.get(self.path)
+            if output is None:
+                self.send_error(404)
+                return
+            status, body, etag, content_type = output
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if include_body:
+                self.wfile.write(body)
+
+        def send_events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            version = site.version
+            try:
+                while True:
+                    new_version = site.wait_for_change(version, 15)
+                    if new_version != version:
+                        self.wfile.write(b"data: reload\n\n")
+                        self.wfile.flush()
+                        return
+                    self.wfile.write(b": ping\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def watch(site, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            site.refresh()
+        except Exception as e:
+            print(f"Rebuild failed: {type(e).__name__}: {e}")
+
+
+def serve(argv, dir_path_content, dir_path_static, template_path):
+    parser = argparse.ArgumentParser(prog="main.py serve")
+    parser.add_argument("--watch", action="store_true", help="rebuild on changes")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--interval", type=float, default=0.5, help="polling interval in seconds"
+    )
+    parser.add_argument("--drafts", action="store_true", help="serve draft pages")
+    args = parser.parse_args(argv)
+
+    frontmatter.configure(drafts=args.drafts)
+    blockcache.configure()
+    site = SiteCache(dir_path_content, dir_path_static, template_path, args.watch)
+    start = time.perf_counter()
+    site.start()
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {len(site.outputs)} page(s) in {elapsed:.2f} s")
+
+    if args.watch:
+        threading.Thread(target=watch, args=(site, args.interval), daemon=True).start()
+
+    httpd = ThreadingHTTPServer(("", args.port), make_handler(site))
+    httpd.daemon_threads = True
+    print(f"Serving on http://localhost:{args.port}/")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
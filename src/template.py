@@ -0,0 +1,49 @@
+import os
+import re
+
+import assets
+
+
+placeholder_pattern = re.compile(r"\{\{ (\w+) \}\}")
+root_url_pattern = re.compile(r'((?:href|src)=")/([^"]*)"')
+
+_templates = {}
+
+
+class Template:
+    def __init__(self, text, basepath="/"):
+        def rewrite(match):
+            url = assets.asset_url("/" + match[2])
+            return match[1] + basepath + url[1:] + '"'
+
+        text = root_url_pattern.sub(rewrite, text)
+        self.segments = placeholder_pattern.split(text)
+
+    def render(self, values):
+        parts = []
+        self.write(parts.append, values)
+        return "".join(parts)
+
+    def write(self, write, values):
+        for i in range(len(self.segments)):
+            segment = self.segments[i]
+            if i % 2 == 0:
+                write(segment)
+            elif segment not in values:
+                write("{{ " + segment + " }}")
+            elif callable(values[segment]):
+                values[segment](write)
+            else:
+                write(values[segment])
+
+
+def load_template(template_path, basepath="/"):
+    stat = os.stat(template_path)
+    stamp = (stat.st_mtime_ns, stat.st_size, assets.version())
+    cached = _templates.get((template_path, basepath))
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(template_path, "r") as f:
+        template = Template(f.read(), basepath)
+    _templates[(template_path, basepath)] = (stamp, template)
+    return template
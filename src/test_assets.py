@@ -0,0 +1,115 @@
+import os
+import unittest
+
+import assets
+import blockcache
+from copystatic import sync_static_files
+from manifest import PageStore
+from markdown_blocks import markdown_to_html_node
+from template import Template
+from test_gencontent import BuildTestCase, TempDirTestCase
+
+
+class TestAssets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.static, "robots.txt"), "")
+
+    def tearDown(self):
+        assets.configure()
+        super().tearDown()
+
+    def test_asset_map(self):
+        asset_map = assets.build_asset_map(self.static)
+        self.assertEqual(sorted(asset_map), ["/images/a.png", "/index.css"])
+        self.assertRegex(asset_map["/index.css"], r"^/index\.[0-9a-f]{8}\.css$")
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertNotEqual(
+            assets.build_asset_map(self.static)["/index.css"], asset_map["/index.css"]
+        )
+
+    def test_fingerprint_of_transformed_file(self):
+        plain = assets.build_asset_map(self.static)
+        minified = assets.build_asset_map(
+            self.static,
+            transform=lambda path: "body{}" if path.endswith(".css") else None,
+        )
+        self.assertNotEqual(minified["/index.css"], plain["/index.css"])
+        self.assertEqual(
+            minified["/index.css"],
+            assets.fingerprinted_url("/index.css", assets.text_digest("body{}")),
+        )
+        self.assertEqual(minified["/images/a.png"], plain["/images/a.png"])
+
+    def test_asset_url(self):
+        assets.configure({"/index.css": "/index.abc.css"})
+        self.assertEqual(assets.asset_url("/index.css"), "/index.abc.css")
+        self.assertEqual(assets.asset_url("/index.css?v=1"), "/index.abc.css?v=1")
+        self.assertEqual(assets.asset_url("/index.css#x"), "/index.abc.css#x")
+        self.assertEqual(assets.asset_url("/other.css"), "/other.css")
+
+    def test_sync_fingerprinted_files(self):
+        asset_map = assets.build_asset_map(self.static)
+        files = sync_static_files(self.static, self.public, fingerprints=asset_map)
+        self.assertEqual(
+            sorted(os.path.relpath(path, self.public) for path in files),
+            sorted(
+                [
+                    asset_map["/images/a.png"][1:],
+                    asset_map["/index.css"][1:],
+                    "robots.txt",
+                ]
+            ),
+        )
+
+    def test_references_rewritten(self):
+        assets.configure(
+            {"/index.css": "/index.abc.css", "/images/a.png": "/images/a.def.png"}
+        )
+        template = Template('<link href="/index.css" /><a href="/about">x</a>', "/s/")
+        self.assertEqual(
+            template.render({}),
+            '<link href="/s/index.abc.css" /><a href="/s/about">x</a>',
+        )
+        html = markdown_to_html_node("![a](/images/a.png) [b](/index.css)").to_html()
+        self.assertIn('src="/images/a.def.png"', html)
+        self.assertIn('href="/index.abc.css"', html)
+
+
+class TestAssetDependencies(BuildTestCase):
+    template_text = '<link href="/index.css" />{{ Content }}'
+    sources = {"a.md": "# A\n\n[download](/a.pdf)", "b.md": "# B"}
+
+    def setUp(self):
+        super().setUp()
+        self.asset_map = {"/index.css": "/index.1.css", "/a.pdf": "/a.1.pdf"}
+        assets.configure(self.asset_map)
+
+    def tearDown(self):
+        assets.configure()
+        super().tearDown()
+
+    def test_only_pages_using_a_changed_asset_rebuild(self):
+        pages = PageStore()
+        self.assertEqual(self.rendered(pages), ["a.md", "b.md"])
+        self.assertEqual(
+            pages.entry(self.source("a.md"))["assets"],
+            {"/index.css": "/index.1.css", "/a.pdf": "/a.1.pdf"},
+        )
+        assets.configure(dict(self.asset_map, **{"/a.pdf": "/a.2.pdf"}))
+        self.assertEqual(self.rendered(pages), ["a.md"])
+        assets.configure(dict(self.asset_map, **{"/index.css": "/index.2.css"}))
+        self.assertEqual(self.rendered(pages), ["a.md", "b.md"])
+
+    def test_block_key_depends_on_referenced_assets(self):
+        key = blockcache.block_key("[a](/a.pdf)", "/")
+        assets.configure(dict(self.asset_map, **{"/index.css": "/index.2.css"}))
+        self.assertEqual(blockcache.block_key("[a](/a.pdf)", "/"), key)
+        assets.configure(dict(self.asset_map, **{"/a.pdf": "/a.2.pdf"}))
+        self.assertNotEqual(blockcache.block_key("[a](/a.pdf)", "/"), key)
+
+
+if __name__ == "__main__":
+    unittest.main()
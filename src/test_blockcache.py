@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+
+import blockcache
+import highlight
+import tracing
+from blockcache import BlockCache, block_key
+from markdown_blocks import markdown_to_html_node
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = BlockCache(max_bytes=25)
+        cache.put("a", "x" * 7)
+        cache.put("b", "x" * 7)
+        self.assertEqual(cache.get("a"), "x" * 7)
+        cache.put("c", "x" * 7)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "x" * 7)
+        self.assertEqual(
+            cache.stats(),
+            {
+                "entries": 2,
+                "bytes": 20,
+                "max_bytes": 25,
+                "hits": 2,
+                "misses": 1,
+                "evictions": 1,
+            },
+        )
+
+    def test_oversized_entry_not_cached(self):
+        cache = BlockCache(max_bytes=10)
+        cache.put("a", "x" * 20)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.bytes, 0)
+
+    def test_persistent_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            BlockCache(dir_path=tmp).put("abcd", "<p>hi</p>")
+            cache = BlockCache(dir_path=tmp)
+            self.assertEqual(cache.get("abcd"), "<p>hi</p>")
+            self.assertEqual(cache.hits, 1)
+
+    def test_key_depends_on_basepath(self):
+        self.assertNotEqual(block_key("[a](/b)", "/"), block_key("[a](/b)", "/x/"))
+
+    @unittest.skipUnless(highlight.available(), "Pygments is not installed")
+    def test_key_depends_on_highlighter(self):
+        block = "```python\nx = 1\n```"
+        key = block_key(block, "/")
+        available = highlight._available
+        highlight._available = False
+        try:
+            self.assertNotEqual(block_key(block, "/"), key)
+        finally:
+            highlight._available = available
+
+
+class TestCachedRendering(unittest.TestCase):
+    def setUp(self):
+        blockcache.configure()
+        tracing.enable(record_events=False)
+
+    def tearDown(self):
+        blockcache.configure(0)
+        tracing.disable()
+
+    def test_same_output(self):
+        md = "# Title\n\nSome **bold** [link](/a)\n\n- one\n- two\n\nSome **bold** [link](/a)"
+        expected = markdown_to_html_node(md, "/base/").to_html()
+        blockcache.configure(0)
+        self.assertEqual(markdown_to_html_node(md, "/base/").to_html(), expected)
+
+    def test_counters(self):
+        md = "Shared disclaimer\n\nBody"
+        markdown_to_html_node(md)
+        markdown_to_html_node(md)
+        _, counters = tracing.take_stats()
+        self.assertEqual(counters, {"block.miss": 2, "block.hit": 2})
+        self.assertEqual(blockcache.get_cache().hits, 2)
+
+    def test_basepath_separates_entries(self):
+        md = "[link](/a)"
+        self.assertIn('href="/a"', markdown_to_html_node(md).to_html())
+        self.assertIn('href="/x/a"', markdown_to_html_node(md, "/x/").to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import unittest
+
+from copystatic import copy_file, sync_static_files
+from report import BuildReport
+from test_gencontent import TempDirTestCase
+
+
+class TestSyncStaticFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def test_copies_files(self):
+        files = sync_static_files(self.static, self.public)
+        self.assertEqual(
+            files,
+            [
+                os.path.join(self.public, "images", "a.png"),
+                os.path.join(self.public, "index.css"),
+            ],
+        )
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "body {}")
+
+    def test_skips_unchanged_files(self):
+        sync_static_files(self.static, self.public)
+        css = os.path.join(self.public, "index.css")
+        self.write(css, "edited!")
+        source_stat = os.stat(os.path.join(self.static, "index.css"))
+        os.utime(css, ns=(0, source_stat.st_mtime_ns))
+        sync_static_files(self.static, self.public)
+        self.assertEqual(self.read(css), "edited!")
+
+    def test_checksum_detects_changes(self):
+        sync_static_files(self.static, self.public)
+        css = os.path.join(self.public, "index.css")
+        stat = os.stat(css)
+        self.write(css, "edited!")
+        os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        sync_static_files(self.static, self.public, checksum=True)
+        self.assertEqual(self.read(css), "body {}")
+
+    def test_removes_stale_files_only(self):
+        files = sync_static_files(self.static, self.public)
+        page = os.path.join(self.public, "index.html")
+        self.write(page, "<html></html>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        sync_static_files(self.static, self.public, files)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "a.png")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_reports_output_changes(self):
+        files = sync_static_files(self.static, self.public)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.write(os.path.join(self.static, "b.png"), "png")
+        report = BuildReport()
+        sync_static_files(self.static, self.public, files, report=report)
+        self.assertEqual(
+            report.output_changes(self.public),
+            {
+                "added": ["/b.png"],
+                "changed": ["/index.css"],
+                "removed": ["/images/a.png"],
+            },
+        )
+        self.assertEqual(sorted(os.listdir(self.public)), ["b.png", "index.css"])
+
+    def test_prunes_empty_directories(self):
+        self.write(os.path.join(self.static, "fonts", "sub", "a.woff"), "woff")
+        files = sync_static_files(self.static, self.public)
+        page = os.path.join(self.public, "images", "index.html")
+        self.write(page, "<html></html>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        os.remove(os.path.join(self.static, "fonts", "sub", "a.woff"))
+        os.rmdir(os.path.join(self.static, "fonts", "sub"))
+        os.rmdir(os.path.join(self.static, "fonts"))
+        sync_static_files(self.static, self.public, files)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "fonts")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_hardlink(self):
+        sync_static_files(self.static, self.public, hardlink=True)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.static, "index.css"),
+                os.path.join(self.public, "index.css"),
+            )
+        )
+        sync_static_files(self.static, self.public)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.static, "index.css"),
+                os.path.join(self.public, "index.css"),
+            )
+        )
+
+    def test_copy_file_large(self):
+        source = os.path.join(self.tmp.name, "large.bin")
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        with open(source, "wb") as f:
+            f.write(data)
+        dest = os.path.join(self.tmp.name, "copy.bin")
+        copy_file(source, dest)
+        with open(dest, "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(os.stat(source).st_mtime_ns, os.stat(dest).st_mtime_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from corpus import CorpusConfig, generate_corpus
+from gencontent import generate_pages_recursive
+
+
+class TestCorpus(unittest.TestCase):
+    def read_tree(self, dir_path):
+        files = {}
+        for root, _, filenames in os.walk(dir_path):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, dir_path)] = f.read()
+        return files
+
+    def test_reproducible(self):
+        config = CorpusConfig(pages=5, blocks=8, seed=7)
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            generate_corpus(a, config)
+            generate_corpus(b, config)
+            self.assertEqual(self.read_tree(a), self.read_tree(b))
+
+    def test_corpus_builds(self):
+        config = CorpusConfig(
+            pages=12, blocks=15, link_density=0.2, emphasis_density=0.2
+        )
+        with tempfile.TemporaryDirectory() as dir_path:
+            content, _, template = generate_corpus(dir_path, config)
+            out = os.path.join(dir_path, "out")
+            errors = generate_pages_recursive(content, template, out, "/")
+            self.assertEqual(errors, [])
+            self.assertEqual(len(self.read_tree(out)), 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+
+import frontmatter
+import tracing
+from frontmatter import (
+    parse_front_matter,
+    read_front_matter,
+    scan_front_matter,
+    split_front_matter,
+)
+from manifest import PageStore
+from report import BuildReport
+from test_gencontent import BuildTestCase
+
+
+class TestParse(unittest.TestCase):
+    def test_parse_fields(self):
+        header = [
+            "title: 'The Road: Part 1'\n",
+            "date: 2024-03-01\n",
+            "tags: [elves, \"rings\"]\n",
+            "# comment\n",
+            "draft: true\n",
+            "layout: post\n",
+        ]
+        self.assertEqual(
+            parse_front_matter(header),
+            {
+                "title": "The Road: Part 1",
+                "date": "2024-03-01",
+                "tags": ["elves", "rings"],
+                "draft": True,
+                "layout": "post",
+            },
+        )
+
+    def test_comma_separated_tags(self):
+        self.assertEqual(
+            parse_front_matter(["tags: elves, dwarves\n", "draft: no\n"]),
+            {"tags": ["elves", "dwarves"], "draft": False},
+        )
+
+    def test_split(self):
+        lines = ["---\n", "title: Hi\n", "---\n", "# Heading\n"]
+        front_matter, body, first_line = split_front_matter(iter(lines))
+        self.assertEqual(front_matter, {"title": "Hi"})
+        self.assertEqual(list(body), ["# Heading\n"])
+        self.assertEqual(first_line, 4)
+
+    def test_unterminated_header_is_content(self):
+        lines = ["---\n", "title: Hi\n"]
+        front_matter, body, first_line = split_front_matter(iter(lines))
+        self.assertEqual((front_matter, list(body), first_line), ({}, lines, 1))
+
+    def test_no_header_keeps_first_line(self):
+        lines = ["# Heading\n", "\n", "text\n"]
+        front_matter, body, first_line = split_front_matter(iter(lines))
+        self.assertEqual((front_matter, list(body), first_line), ({}, lines, 1))
+
+
+class TestScan(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        os.makedirs(os.path.join(self.content, "blog"))
+
+    def tearDown(self):
+        frontmatter.configure()
+        tracing.disable()
+        self.tmp.cleanup()
+
+    def write(self, path, header, body=b"# Post\n"):
+        with open(os.path.join(self.content, path), "wb") as f:
+            f.write(b"---\n" + header.encode("utf-8") + b"---\n" + body)
+
+    def test_reads_only_the_header(self):
+        self.write("post.md", "title: Big\n", b"x" * 100000 + b"\xff\n")
+        path = os.path.join(self.content, "post.md")
+        self.assertEqual(read_front_matter(path), {"title": "Big"})
+
+    def test_scan(self):
+        self.write("index.md", "title: Home\n")
+        self.write(os.path.join("blog", "a.md"), "date: 2024-01-02\ntags: elves\n")
+        self.assertEqual(
+            scan_front_matter(self.content),
+            {
+                "/index.md": {"title": "Home"},
+                "/blog/a.md": {"date": "2024-01-02", "tags": ["elves"]},
+            },
+        )
+
+
+class TestBuild(BuildTestCase):
+    sources = {}
+
+    def setUp(self):
+        super().setUp()
+        self.layout = os.path.join(self.tmp.name, "layouts", "post.html")
+        self.write(self.layout, "<article>{{ Title }}</article>")
+
+    def tearDown(self):
+        frontmatter.configure()
+        super().tearDown()
+
+    def output(self, name):
+        return self.read(os.path.join(self.public, name))
+
+    def test_title_and_layout(self):
+        self.write(
+            self.source("post.md"),
+            "---\ntitle: Override\nlayout: post\n---\n# Heading\n",
+        )
+        self.write(self.source("plain.md"), "---\n---\n# Plain\n")
+        self.assertEqual(self.build(PageStore()), [])
+        self.assertEqual(self.output("post.html"), "<article>Override</article>")
+        self.assertEqual(
+            self.output("plain.html"),
+            '<title>Plain</title><div><h1 id="plain">Plain</h1></div>',
+        )
+
+    def test_layout_change_rebuilds_page(self):
+        post = self.source("post.md")
+        self.write(post, "---\nlayout: post\n---\n# A\n")
+        pages = PageStore()
+        self.build(pages)
+        self.write(self.layout, "<main>{{ Title }}</main>")
+        self.build(pages)
+        self.assertEqual(self.output("post.html"), "<main>A</main>")
+
+    def test_drafts(self):
+        draft = self.source("draft.md")
+        self.write(self.source("index.md"), "# Home")
+        self.write(draft, "---\ndraft: true\n---\n# Draft\n")
+        pages = PageStore()
+        frontmatter.configure(drafts=True)
+        self.build(pages)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "draft.html")))
+        frontmatter.configure()
+        self.build(pages)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "draft.html")))
+        self.assertNotIn(draft, pages)
+
+    def test_front_matter_cached_in_page_store(self):
+        post = self.source("post.md")
+        self.write(post, "---\ntitle: A\n---\n# A\n")
+        self.write(self.source("index.md"), "# Home")
+        pages = PageStore()
+        report = BuildReport()
+        self.build(pages, report)
+        self.write(post, "---\ntitle: B\n---\n# A\n")
+        self.build(pages, report)
+        self.assertEqual(report.counters["frontmatter.miss"], 3)
+        self.assertEqual(report.counters["frontmatter.hit"], 1)
+        self.assertEqual(pages.get(post)["front_matter"], {"title": "B"})
+
+    def test_missing_layout_fails_page(self):
+        post = self.source("post.md")
+        self.write(post, "---\nlayout: nope\n---\n# A\n")
+        errors = self.build(PageStore())
+        self.assertEqual(len(errors), 1)
+        self.assertIn("FileNotFoundError", errors[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
+import os
+import tempfile
 import unittest
+from pathlib import Path
 
-from gencontent import extract_title
+import tracing
+from gencontent import extract_title, generate_pages_recursive
+from manifest import PageStore
+from report import BuildReport, ranked
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -46,5 +52,178 @@ no title
             pass
 
 
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(self.static)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def outputs(self, dir_path=None):
+        dir_path = dir_path or self.public
+        outputs = {}
+        for parent, _, filenames in os.walk(dir_path):
+            for filename in filenames:
+                path = os.path.join(parent, filename)
+                outputs[os.path.relpath(path, dir_path)] = self.read(path)
+        return outputs
+
+
+class BuildTestCase(TempDirTestCase):
+    template_text = "<title>{{ Title }}</title>{{ Content }}"
+    sources = {"index.md": "# Home", "blog/post.md": "# Post"}
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        self.write(self.template, self.template_text)
+        for name, text in self.sources.items():
+            self.write(self.source(name), text)
+
+    def source(self, name):
+        return os.path.join(self.content, *name.split("/"))
+
+    def build(
+        self, pages=None, report=None, jobs=1, search_index=None, link_index=None
+    ):
+        return generate_pages_recursive(
+            self.content,
+            self.template,
+            self.public,
+            "/",
+            pages,
+            jobs,
+            report,
+            search_index,
+            link_index,
+        )
+
+    def rendered(self, pages):
+        report = BuildReport(top=100)
+        self.build(pages, report)
+        return sorted(
+            Path(os.path.relpath(page["source"], self.content)).as_posix()
+            for page in ranked(report.slowest_pages)
+        )
+
+
+class TestIncrementalBuild(BuildTestCase):
+    def test_skips_unchanged_pages(self):
+        pages = PageStore()
+        self.build(pages)
+        post = os.path.join(self.public, "blog", "post.html")
+        self.write(post, "stale")
+        self.build(pages)
+        self.assertEqual(self.read(post), "stale")
+
+    def test_rebuilds_changed_source(self):
+        pages = PageStore()
+        self.build(pages)
+        self.write(self.source("index.md"), "# New home")
+        self.build(pages)
+        html = self.read(os.path.join(self.public, "index.html"))
+        self.assertIn('<h1 id="new-home">New home</h1>', html)
+
+    def test_template_change_invalidates_all(self):
+        pages = PageStore()
+        self.build(pages)
+        self.write(self.template, "<h6>{{ Title }}</h6>")
+        self.build(pages)
+        post = self.read(os.path.join(self.public, "blog", "post.html"))
+        self.assertEqual(post, "<h6>Post</h6>")
+
+    def test_removes_deleted_pages(self):
+        pages = PageStore()
+        self.build(pages)
+        os.remove(self.source("blog/post.md"))
+        self.build(pages)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertEqual(len(pages), 1)
+
+    def test_records_page_metadata(self):
+        pages = PageStore()
+        self.write(self.source("index.md"), "# Home\n\nWelcome [in](/blog/post)")
+        self.build(pages)
+        home = pages.metadata(self.source("index.md"))
+        self.assertEqual(home["title"], "Home")
+        self.assertEqual(home["summary"], "Welcome in")
+        self.assertEqual(home["links"], [["/blog/post", 3]])
+        os.remove(self.source("blog/post.md"))
+        self.build(pages)
+        self.assertEqual(list(pages), [self.source("index.md")])
+
+    def test_output_changes(self):
+        pages = PageStore()
+        self.build(pages)
+        self.write(self.source("index.md"), "# Home\n\n")
+        self.write(self.source("new.md"), "# New")
+        os.remove(self.source("blog/post.md"))
+        index = os.path.join(self.public, "index.html")
+        os.utime(index, ns=(0, 0))
+        report = BuildReport()
+        tracing.enable(record_events=False)
+        try:
+            self.build(pages, report)
+        finally:
+            tracing.disable()
+        self.assertEqual(
+            report.output_changes(self.public),
+            {"added": ["/new.html"], "changed": [], "removed": ["/blog/post.html"]},
+        )
+        self.assertEqual(os.stat(index).st_mtime_ns, 0)
+        self.assertEqual(report.counters["output.hit"], 1)
+
+
+class TestParallelBuild(BuildTestCase):
+    def test_parallel_matches_serial(self):
+        for i in range(8):
+            self.write(
+                os.path.join(self.content, "blog", f"post{i}.md"),
+                f"# Post {i}\n\nSome **bold** and a [link](/blog/post{i})",
+            )
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, self.public, "/x/")
+        generate_pages_recursive(self.content, self.template, parallel, "/x/", None, 4)
+        self.assertEqual(len(self.outputs(parallel)), 10)
+        self.assertEqual(self.outputs(parallel), self.outputs())
+
+    def test_errors_reported_per_page(self):
+        bad = self.source("blog/bad.md")
+        self.write(bad, "no title here")
+        pages = PageStore()
+        errors = self.build(pages, jobs=2)
+        self.assertEqual([from_path for from_path, _ in errors], [bad])
+        self.assertIn("no title found", errors[0][1])
+        self.assertNotIn(bad, pages)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_failed_page_leaves_no_output(self):
+        self.write(self.source("bad.md"), "# Bad\n\n**unclosed")
+        errors = self.build()
+        self.assertEqual(len(errors), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "bad.html")))
+
+    def test_failed_page_keeps_previous_output(self):
+        self.write(self.source("bad.md"), "# Bad\n\n**unclosed")
+        self.write(os.path.join(self.public, "bad.html"), "previous")
+        errors = self.build()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.read(os.path.join(self.public, "bad.html")), "previous")
+
+
 if __name__ == "__main__":
     unittest.main()
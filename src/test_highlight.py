@@ -0,0 +1,84 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import highlight
+import tracing
+from markdown_blocks import markdown_to_html_node
+
+
+@unittest.skipUnless(importlib.util.find_spec("pygments"), "pygments not installed")
+class TestHighlight(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        highlight.configure(self.tmp.name)
+        tracing.enable(record_events=False)
+
+    def tearDown(self):
+        highlight.configure()
+        tracing.disable()
+        self.tmp.cleanup()
+
+    def test_highlighted_code_block(self):
+        md = "```python\nx = 1\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertTrue(
+            html.startswith(
+                '<div><pre class="highlight"><code class="language-python">'
+                '<span class="n">x</span>'
+            )
+        )
+
+    def test_unknown_language(self):
+        md = "```nosuchlanguage\nx < 1\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-nosuchlanguage">x < 1\n</code></pre></div>',
+        )
+
+    def test_plain_code_block(self):
+        md = "```\nx = 1\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><pre><code>x = 1\n</code></pre></div>")
+
+    def test_persistent_cache(self):
+        first = highlight.highlight_code("x = 1\n", "python")
+        highlight.configure(self.tmp.name)
+        second = highlight.highlight_code("x = 1\n", "python")
+        self.assertEqual(first, second)
+        _, counters = tracing.take_stats()
+        self.assertEqual(counters, {"highlight.miss": 1, "highlight.hit": 1})
+        files = [name for _, _, names in os.walk(self.tmp.name) for name in names]
+        self.assertEqual(len(files), 1)
+
+    def test_style_is_part_of_key(self):
+        highlight.highlight_code("x = 1\n", "python")
+        highlight.configure(self.tmp.name, "monokai")
+        highlight.highlight_code("x = 1\n", "python")
+        _, counters = tracing.take_stats()
+        self.assertEqual(counters, {"highlight.miss": 2})
+
+    def test_stylesheet(self):
+        self.assertIn(".highlight", highlight.stylesheet())
+
+    def test_stylesheet_link(self):
+        self.assertEqual(
+            highlight.stylesheet_link("/site/"),
+            '<link href="/site/highlight.css" rel="stylesheet" />',
+        )
+
+
+class TestWithoutPygments(unittest.TestCase):
+    def test_no_stylesheet_link(self):
+        available = highlight._available
+        highlight._available = False
+        try:
+            self.assertEqual(highlight.stylesheet_link(), "")
+        finally:
+            highlight._available = available
+
+
+if __name__ == "__main__":
+    unittest.main()
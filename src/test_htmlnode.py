@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode
 
@@ -108,6 +109,36 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_write_html_chunks(self):
+        node = ParentNode(
+            "ul",
+            [
+                ParentNode("li", [LeafNode("b", "one")]),
+                ParentNode("li", [LeafNode(None, "two")]),
+            ],
+        )
+        chunks = []
+        node.write_html(chunks.append)
+        self.assertEqual(
+            chunks,
+            ["<ul>", "<li>", "<b>one</b>", "</li>", "<li>", "two", "</li>", "</ul>"],
+        )
+
+    def test_write_html_file(self):
+        node = ParentNode("div", [LeafNode("a", "link", {"href": "/x"})])
+        out = io.StringIO()
+        node.write_html(out.write)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertEqual(out.getvalue(), '<div><a href="/x">link</a></div>')
+
+    def test_parent_no_children(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", None).to_html()
+
+    def test_slots(self):
+        for node in [HTMLNode("p"), LeafNode("b", "x"), ParentNode("p", [])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
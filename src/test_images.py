@@ -0,0 +1,145 @@
+import os
+import struct
+import tempfile
+import unittest
+
+import blockcache
+import images
+import tracing
+from corpus import png_bytes
+from manifest import PageStore
+from markdown_blocks import markdown_to_html_node
+from test_gencontent import BuildTestCase
+
+
+def gif_bytes(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00" * 10
+
+
+def jpeg_bytes(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x00" * 3
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+
+def webp_bytes(chunk, payload):
+    body = b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return images.image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size(png_bytes(12, 7)), (12, 7))
+
+    def test_gif(self):
+        self.assertEqual(self.size(gif_bytes(300, 200)), (300, 200))
+
+    def test_jpeg(self):
+        self.assertEqual(self.size(jpeg_bytes(640, 480)), (640, 480))
+
+    def test_webp_lossy(self):
+        payload = b"\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", 320, 240)
+        self.assertEqual(self.size(webp_bytes(b"VP8 ", payload)), (320, 240))
+
+    def test_webp_lossless(self):
+        bits = (320 - 1) | ((240 - 1) << 14)
+        payload = b"\x2f" + struct.pack("<I", bits)
+        self.assertEqual(self.size(webp_bytes(b"VP8L", payload)), (320, 240))
+
+    def test_webp_extended(self):
+        width = (320 - 1).to_bytes(3, "little")
+        height = (240 - 1).to_bytes(3, "little")
+        payload = b"\x00" * 4 + width + height
+        self.assertEqual(self.size(webp_bytes(b"VP8X", payload)), (320, 240))
+
+    def test_unknown(self):
+        self.assertIsNone(self.size(b"<svg></svg>"))
+        self.assertIsNone(self.size(b"\xff\xd8\xff\xd9"))
+
+
+class TestImageIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.cache = os.path.join(self.tmp.name, "cache", "images.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "a.png"), "wb") as f:
+            f.write(png_bytes(10, 20))
+        with open(os.path.join(self.static, "index.css"), "w") as f:
+            f.write("body {}")
+        tracing.enable(record_events=False)
+
+    def tearDown(self):
+        images.configure()
+        tracing.disable()
+        self.tmp.cleanup()
+
+    def test_index_cached_by_stat(self):
+        index = images.build_index(self.static, self.cache)
+        self.assertEqual(index, {"/images/a.png": (10, 20)})
+        self.assertEqual(images.build_index(self.static, self.cache), index)
+        _, counters = tracing.take_stats()
+        self.assertEqual(counters, {"image.miss": 1, "image.hit": 1})
+
+    def test_image_attributes(self):
+        images.configure(images.build_index(self.static))
+        html = markdown_to_html_node(
+            "![a](/images/a.png) ![b](https://example.com/b.png)", "/site/"
+        ).to_html()
+        self.assertEqual(
+            html,
+            '<div><p><img src="/site/images/a.png" alt="a" width="10" height="20" '
+            'loading="lazy" decoding="async"></img> '
+            '<img src="https://example.com/b.png" alt="b" '
+            'loading="lazy" decoding="async"></img></p></div>',
+        )
+
+
+class TestImageDependencies(BuildTestCase):
+    template_text = "{{ Content }}"
+    sources = {
+        "cat.md": "# Cat\n\n![cat](/cat.png)",
+        "dog.md": "# Dog\n\n![dog](/dog.png)",
+    }
+
+    def setUp(self):
+        super().setUp()
+        images.configure({"/cat.png": (4, 3), "/dog.png": (2, 2)})
+
+    def tearDown(self):
+        images.configure()
+        super().tearDown()
+
+    def test_only_pages_using_a_resized_image_rebuild(self):
+        pages = PageStore()
+        self.assertEqual(self.rendered(pages), ["cat.md", "dog.md"])
+        cat = pages.entry(self.source("cat.md"))
+        self.assertEqual(cat["images"], {"/cat.png": [4, 3]})
+        self.assertEqual(self.rendered(pages), [])
+        images.configure({"/cat.png": (8, 6), "/dog.png": (2, 2), "/new.png": (1, 1)})
+        self.assertEqual(self.rendered(pages), ["cat.md"])
+        html = self.read(os.path.join(self.public, "cat.html"))
+        self.assertIn('width="8" height="6"', html)
+
+    def test_block_key_depends_on_referenced_images(self):
+        key = blockcache.block_key("![cat](/cat.png)", "/")
+        images.configure({"/cat.png": (4, 3), "/dog.png": (3, 3)})
+        self.assertEqual(blockcache.block_key("![cat](/cat.png)", "/"), key)
+        images.configure({"/cat.png": (5, 3), "/dog.png": (3, 3)})
+        self.assertNotEqual(blockcache.block_key("![cat](/cat.png)", "/"), key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
+import random
 import unittest
 from inline_markdown import (
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    text_to_textnodes_reference,
     extract_markdown_links,
     extract_markdown_images,
 )
@@ -192,5 +194,92 @@ class TestInlineMarkdown(unittest.TestCase):
         )
 
 
+class TestSinglePassTokenizer(unittest.TestCase):
+    cases = [
+        "",
+        "plain text",
+        "**bold** at start and **end**",
+        "a****b",
+        "_italic_ then `code` then **bold**",
+        "![image](/a.png)![second](/b.png)",
+        "[link](/a)[second](/b) trailing",
+        "![not an image](a(b)) and [not a link] (x)",
+        "mixed [link](https://boot.dev) and ![img](/i.png) with _em_",
+        "an exclamation! [link](/x) and ![](/empty-alt.png)",
+        "[< Back Home](/)",
+        "[a](/x_y_z)",
+        "[**x**](/y)",
+        "![a_b](/c_d.png)",
+        "**!**[a](/b)",
+        "`a_b`",
+        "`a_b_c` and **x*y**",
+    ]
+
+    def outcome(self, tokenize, text):
+        try:
+            return tokenize(text)
+        except ValueError as e:
+            return str(e)
+
+    def assert_matches_reference(self, text):
+        self.assertEqual(
+            self.outcome(text_to_textnodes, text),
+            self.outcome(text_to_textnodes_reference, text),
+            text,
+        )
+
+    def test_matches_reference(self):
+        for text in self.cases:
+            self.assert_matches_reference(text)
+
+    def test_delimiters_are_split_before_links(self):
+        self.assertListEqual(
+            text_to_textnodes("[a](/x_y_z)"),
+            [
+                TextNode("[a](/x", TextType.TEXT),
+                TextNode("y", TextType.ITALIC),
+                TextNode("z)", TextType.TEXT),
+            ],
+        )
+        self.assertListEqual(
+            text_to_textnodes("[**x**](/y)"),
+            [
+                TextNode("[", TextType.TEXT),
+                TextNode("x", TextType.BOLD),
+                TextNode("](/y)", TextType.TEXT),
+            ],
+        )
+        with self.assertRaises(ValueError):
+            text_to_textnodes("`a_b`")
+
+    def test_matches_reference_random(self):
+        rng = random.Random(1234)
+        pieces = [
+            "word ",
+            "more words. ",
+            "**bold** ",
+            "_italic_ ",
+            "`code` ",
+            "[link](https://boot.dev/x) ",
+            "![image](/images/x.png) ",
+            "! ",
+            "[brackets] ",
+            "[under](/x_y_z) ",
+            "[star](/a**b**c) ",
+            "![a_b](/c_d.png) ",
+            "`a_b_c` ",
+            "`a**b**c` ",
+            "_ ",
+        ]
+        for _ in range(500):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+            self.assert_matches_reference(text)
+
+    def test_unclosed_delimiter(self):
+        for text in ["**bold", "_italic", "`code"]:
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+
+
 if __name__ == "__main__":
     unittest.main()
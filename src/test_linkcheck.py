@@ -0,0 +1,108 @@
+import os
+import unittest
+
+import assets
+from copystatic import sync_static_files
+from linkcheck import OutputIndex, check_links, index_outputs
+from manifest import PageStore
+from test_gencontent import BuildTestCase
+
+
+class TestOutputIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = OutputIndex("public")
+        self.index.add_output("public/index.html", ["home"])
+        self.index.add_output("public/blog/post/index.html", ["intro", "outro"])
+        self.index.add_output("public/blog/other.html", [])
+        self.index.add_output("public/images/a.png")
+        self.index.add_output("public/index.1234abcd.css")
+
+    def tearDown(self):
+        assets.configure()
+
+    def check(self, url, page_url="/blog/post/index.html"):
+        return self.index.check(page_url, url)
+
+    def test_resolves_pages(self):
+        self.assertIsNone(self.check("/"))
+        self.assertIsNone(self.check("/blog/post"))
+        self.assertIsNone(self.check("/blog/post/"))
+        self.assertIsNone(self.check("/blog/other"))
+        self.assertIsNone(self.check("../other.html"))
+        self.assertIsNone(self.check("/images/a.png#ignored"))
+        self.assertEqual(self.check("/blog/missing"), "missing page")
+        self.assertEqual(self.check("/blog/other/"), "missing page")
+
+    def test_anchors(self):
+        self.assertIsNone(self.check("#intro"))
+        self.assertIsNone(self.check("/#home"))
+        self.assertEqual(self.check("#home"), "missing anchor")
+        self.assertEqual(self.check("/blog/other#intro"), "missing anchor")
+
+    def test_skips_external_links(self):
+        for url in ("https://example.com/x", "mailto:a@b.c", "//cdn.example.com/x"):
+            self.assertIsNone(self.check(url))
+
+    def test_fingerprinted_assets(self):
+        self.assertEqual(self.check("/index.css"), "missing page")
+        assets.configure({"/index.css": "/index.1234abcd.css"})
+        self.assertIsNone(self.check("/index.css"))
+
+
+class TestCheckLinks(BuildTestCase):
+    template_text = "{{ Content }}"
+    sources = {
+        "index.md": "---\ntitle: Home\n---\n# Home\n\n[post](/blog/post#setup) and\n"
+        "[gone](/blog/gone) and ![css](/index.css)\n\n- [bad](#nowhere)",
+        "blog/post.md": "# Post\n\n## Setup\n\n[home](../) [style](/missing.css)",
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+    def build(self, pages):
+        manifest = {"static": sync_static_files(self.static, self.public)}
+        index = index_outputs(self.public, manifest, pages)
+        super().build(pages, link_index=index)
+        return check_links(index, pages)
+
+    def test_reports_broken_links_with_lines(self):
+        pages = PageStore()
+        broken = self.build(pages)
+        index = self.source("index.md")
+        post = self.source("blog/post.md")
+        self.assertEqual(self.build(pages), broken)
+        self.assertEqual(
+            broken,
+            [
+                (post, 5, "/missing.css", "missing page"),
+                (index, 7, "/blog/gone", "missing page"),
+                (index, 9, "#nowhere", "missing anchor"),
+            ],
+        )
+
+    def test_defers_only_links_to_unfinished_pages(self):
+        pages = PageStore()
+        self.build(pages)
+        index = self.source("index.md")
+        post = self.source("blog/post.md")
+        self.assertEqual(
+            [(source, link) for source, _, link, _ in pages.deferred_links()],
+            [
+                (post, "../"),
+                (post, "/missing.css"),
+                (index, "/blog/gone"),
+                (index, "#nowhere"),
+            ],
+        )
+
+    def test_links_to_failed_pages_are_broken(self):
+        self.write(self.source("blog/post.md"), "no title")
+        broken = self.build(PageStore())
+        index = self.source("index.md")
+        self.assertIn((index, 6, "/blog/post#setup", "missing page"), broken)
+
+
+if __name__ == "__main__":
+    unittest.main()
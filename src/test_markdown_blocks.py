@@ -1,8 +1,12 @@
+import io
 import unittest
 from markdown_blocks import (
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
+    iter_blocks,
+    iter_typed_blocks,
+    write_markdown_html,
     BlockType,
 )
 
@@ -129,7 +133,7 @@ this is paragraph text
         html = node.to_html()
         self.assertEqual(
             html,
-            "<div><h1>this is an h1</h1><p>this is paragraph text</p><h2>this is an h2</h2></div>",
+            '<div><h1 id="this-is-an-h1">this is an h1</h1><p>this is paragraph text</p><h2 id="this-is-an-h2">this is an h2</h2></div>',
         )
 
     def test_blockquote(self):
@@ -163,6 +167,74 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_basepath_rewrites_links(self):
+        md = """
+[home](/) and ![cat](/images/cat.png) and [out](https://boot.dev)
+
+```
+<a href="/raw">
+```
+"""
+
+        node = markdown_to_html_node(md, "/site/")
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/">home</a> and <img src="/site/images/cat.png" alt="cat" loading="lazy" decoding="async"></img> and <a href="https://boot.dev">out</a></p><pre><code><a href="/raw">\n</code></pre></div>',
+        )
+
+
+class TestStreamingBlocks(unittest.TestCase):
+    documents = [
+        "",
+        "one block",
+        "\n\n\nleading blank lines\n\n\n\n\ntrailing\n\n",
+        "a\n\n\nb\n\n\n\nc\n\n\n\n\nd",
+        "a\n  \nb\n\n   \n\nc",
+        "# heading\n\n- list\n- items\n\n```\ncode\n```\n\n> quote\n> more",
+        "  indented first line\nsecond line  \n\n1. one\n2. two",
+    ]
+
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        for md in self.documents:
+            self.assertEqual(
+                list(iter_blocks(io.StringIO(md))), markdown_to_blocks(md), repr(md)
+            )
+
+    def test_iter_typed_blocks(self):
+        md = "# heading\n\n- list\n- items\n\nparagraph"
+        self.assertEqual(
+            list(iter_typed_blocks(io.StringIO(md))),
+            [
+                ("# heading", BlockType.HEADING),
+                ("- list\n- items", BlockType.ULIST),
+                ("paragraph", BlockType.PARAGRAPH),
+            ],
+        )
+
+    def test_write_markdown_html_matches_tree(self):
+        for md in self.documents:
+            chunks = []
+            write_markdown_html(io.StringIO(md), chunks.append, "/site/")
+            self.assertEqual(
+                "".join(chunks), markdown_to_html_node(md, "/site/").to_html()
+            )
+
+    def test_write_markdown_html_streams_blocks(self):
+        consumed = []
+
+        def lines():
+            for line in ["# a\n", "\n", "b\n", "\n", "c\n"]:
+                consumed.append(line)
+                yield line
+
+        written = []
+        write_markdown_html(
+            lines(), lambda chunk: written.append((chunk, len(consumed)))
+        )
+        self.assertIn(("</h1>", 2), written)
+        self.assertIn(("</p>", 4), written)
+
 
 if __name__ == "__main__":
     unittest.main()
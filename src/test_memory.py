@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import memory
+from corpus import CorpusConfig, generate_corpus
+from gencontent import find_pages, iter_pages
+from report import peak_rss_bytes
+
+
+class TestLimits(unittest.TestCase):
+    def tearDown(self):
+        memory.configure()
+
+    def test_unlimited(self):
+        self.assertEqual(memory.limit_jobs(8), 8)
+        self.assertEqual(memory.limit_queue_depth(8), 8)
+        self.assertEqual(memory.limit_cache_bytes(1 << 26, 9), 1 << 26)
+
+    def test_budget(self):
+        memory.configure(128 * 1024 * 1024)
+        self.assertEqual(memory.limit_jobs(8), 3)
+        self.assertEqual(memory.limit_jobs(2), 2)
+        self.assertEqual(memory.limit_queue_depth(32), 16)
+        self.assertEqual(memory.limit_cache_bytes(1 << 26, 4), 4 * 1024 * 1024)
+
+
+class TestDiscovery(unittest.TestCase):
+    def test_iterative_walk_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            for path in ("b.md", "a/z.md", "a/b/c.md", "c/d.md", "a.md"):
+                path = os.path.join(content, *path.split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write("# x")
+            pages = find_pages(content, "public")
+            self.assertEqual(
+                [os.path.relpath(from_path, content) for from_path, _ in pages],
+                [
+                    os.path.join("a", "b", "c.md"),
+                    os.path.join("a", "z.md"),
+                    "a.md",
+                    "b.md",
+                    os.path.join("c", "d.md"),
+                ],
+            )
+            self.assertEqual(
+                str(pages[0][1]), os.path.join("public", "a", "b", "c.html")
+            )
+            self.assertEqual(list(iter_pages(content, "public")), pages)
+
+
+@unittest.skipIf(peak_rss_bytes() is None, "peak RSS is not available")
+class TestMemoryBudget(unittest.TestCase):
+    budget_mib = 64
+
+    def build(self, pages):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = CorpusConfig(pages=pages, blocks=2, words_per_block=10, images=1)
+            generate_corpus(tmp, config)
+            main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+            subprocess.run(
+                [
+                    sys.executable,
+                    main,
+                    "--jobs",
+                    "1",
+                    "--memory-budget",
+                    str(self.budget_mib),
+                ],
+                cwd=tmp,
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+            with open(os.path.join(tmp, ".cache", "build-report.json")) as f:
+                report = json.load(f)
+        self.assertEqual(report["pages_rendered"], pages)
+        self.assertEqual(report["memory_budget_bytes"], self.budget_mib * 1048576)
+        return report["peak_rss_bytes"]
+
+    def test_peak_rss_is_bounded(self):
+        self.assertLess(self.build(1000), self.budget_mib * 1048576)
+
+    @unittest.skipUnless(
+        os.environ.get("LARGE_BUILD_TESTS"), "set LARGE_BUILD_TESTS=1 to run"
+    )
+    def test_large_build_fits_budget(self):
+        self.assertLess(self.build(10000), self.budget_mib * 1048576)
+
+
+if __name__ == "__main__":
+    unittest.main()
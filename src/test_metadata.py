@@ -0,0 +1,88 @@
+import unittest
+
+import blockcache
+from markdown_blocks import markdown_to_page
+from metadata import slugify, summarize, unique_anchor
+
+
+class TestAnchors(unittest.TestCase):
+    def test_slugify(self):
+        self.assertEqual(slugify("Hello, *World*!"), "hello-world")
+        self.assertEqual(slugify("  The   one_ring - part 2 "), "the-one_ring-part-2")
+        self.assertEqual(slugify("?!"), "section")
+
+    def test_unique_anchor(self):
+        anchors = set()
+        self.assertEqual(unique_anchor("intro", anchors), "intro")
+        self.assertEqual(unique_anchor("intro", anchors), "intro-1")
+        self.assertEqual(unique_anchor("intro", anchors), "intro-2")
+
+    def test_summarize(self):
+        self.assertEqual(summarize("short text", 20), "short text")
+        self.assertEqual(summarize("one two three four", 10), "one two...")
+
+
+class TestPageMetadata(unittest.TestCase):
+    markdown = """# The **Fellowship**
+
+Nine walkers set out from [Rivendell](/rivendell) with ![a map](/map.png).
+
+## Members
+
+- [Frodo](/frodo)
+- [Sam](/sam) and [Frodo](/frodo)
+
+```
+code words are not counted
+```
+
+## Members
+"""
+
+    def setUp(self):
+        blockcache.configure(0)
+
+    def page(self):
+        html_node, page = markdown_to_page(self.markdown.split("\n"))
+        return html_node.to_html(), page
+
+    def test_metadata(self):
+        html, page = self.page()
+        self.assertEqual(page["title"], "The Fellowship")
+        self.assertEqual(
+            page["outline"],
+            [
+                {"level": 1, "text": "The Fellowship", "id": "the-fellowship"},
+                {"level": 2, "text": "Members", "id": "members"},
+                {"level": 2, "text": "Members", "id": "members-1"},
+            ],
+        )
+        self.assertEqual(page["words"], 15)
+        self.assertEqual(page["reading_minutes"], 1)
+        self.assertEqual(page["summary"], "Nine walkers set out from Rivendell with .")
+        self.assertEqual(
+            page["links"],
+            [["/rivendell", 3], ["/frodo", 7], ["/sam", 8], ["/frodo", 8]],
+        )
+        self.assertEqual(page["images"], [["/map.png", 3]])
+        self.assertEqual(len(page["blocks"]), 6)
+        self.assertIn('<h2 id="members">Members</h2>', html)
+        self.assertIn('<h2 id="members-1">Members</h2>', html)
+
+    def test_cached_blocks_keep_metadata(self):
+        expected = self.page()
+        blockcache.configure()
+        try:
+            self.page()
+            self.assertEqual(self.page(), expected)
+        finally:
+            blockcache.configure(0)
+
+    def test_no_title(self):
+        _, page = markdown_to_page(["## Section", "", "text"])
+        self.assertIsNone(page["title"])
+        self.assertEqual(page["summary"], "text")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+
+import tracing
+from minify import HtmlMinifier, minified_css, minify_css
+
+
+def minify_html(chunks, buffer_size=1 << 16):
+    output = []
+    minifier = HtmlMinifier(output.append, buffer_size)
+    for chunk in chunks:
+        minifier.write(chunk)
+    minifier.close()
+    return "".join(output)
+
+
+class TestHtmlMinifier(unittest.TestCase):
+    def test_template_whitespace(self):
+        html = "<!doctype html>\n<html>\n  <head>\n    <title>Hi</title>\n  </head>\n</html>\n"
+        self.assertEqual(
+            minify_html([html]),
+            "<!doctype html><html><head><title>Hi</title></head></html>",
+        )
+
+    def test_inline_whitespace_collapsed(self):
+        self.assertEqual(
+            minify_html(["<p>a  b\n c <b>d</b> <i>e</i></p>"]),
+            "<p>a b c <b>d</b> <i>e</i></p>",
+        )
+
+    def test_preserves_pre(self):
+        html = '<div>\n  <pre class="x"><code>a\n\n    b  </code></pre>\n</div>'
+        self.assertEqual(
+            minify_html([html]),
+            '<div><pre class="x"><code>a\n\n    b  </code></pre></div>',
+        )
+
+    def test_removes_comments(self):
+        self.assertEqual(
+            minify_html(["<p>a</p>\n<!-- note -->\n<p>b</p>"]), "<p>a</p><p>b</p>"
+        )
+
+    def test_comment_containing_gt(self):
+        html = "<p>a</p><!-- a > b -->\n<p>b</p>"
+        self.assertEqual(minify_html([html]), "<p>a</p><p>b</p>")
+        for size in (1, 4, 9):
+            chunks = [html[i : i + size] for i in range(0, len(html), size)]
+            self.assertEqual(minify_html(chunks, 3), "<p>a</p><p>b</p>")
+
+    def test_newline_between_inline_tags_becomes_space(self):
+        self.assertEqual(
+            minify_html(["<p><b>a</b>\n<i>b</i></p>\n<p>c</p>"]),
+            "<p><b>a</b> <i>b</i></p><p>c</p>",
+        )
+
+    def test_chunk_boundaries(self):
+        html = "<html>\n  <body>\n    <pre>x\n  y</pre>\n    <p>a   b</p>\n  </body>\n</html>"
+        expected = minify_html([html])
+        for size in (1, 3, 7):
+            chunks = [html[i : i + size] for i in range(0, len(html), size)]
+            self.assertEqual(minify_html(chunks, 5), expected)
+
+
+class TestCssMinifier(unittest.TestCase):
+    def test_minify_css(self):
+        css = """/* theme */
+body {
+  font-family: "Open  Sans", serif;
+  margin: 0 auto;
+}
+
+h1,
+h2 > a {
+  color: #fff;
+}
+"""
+        self.assertEqual(
+            minify_css(css),
+            'body{font-family:"Open  Sans",serif;margin:0 auto}h1,h2>a{color:#fff}',
+        )
+
+    def test_keeps_selector_and_calc_spaces(self):
+        self.assertEqual(
+            minify_css("a :hover { width: calc(1px + 2px); }"),
+            "a :hover{width:calc(1px + 2px)}",
+        )
+
+    def test_keeps_strings_intact(self):
+        self.assertEqual(
+            minify_css('a::after { content: ";}" ; }'),
+            'a::after{content:";}"}',
+        )
+
+    def test_cached_by_content_hash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.css")
+            with open(path, "w") as f:
+                f.write("a {\n  color: red;\n}\n")
+            cache = os.path.join(tmp, "cache")
+            tracing.enable(record_events=False)
+            try:
+                self.assertEqual(minified_css(path, cache), "a{color:red}")
+                self.assertEqual(minified_css(path, cache), "a{color:red}")
+                _, counters = tracing.take_stats()
+            finally:
+                tracing.disable()
+            self.assertEqual(counters, {"minify.miss": 1, "minify.hit": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
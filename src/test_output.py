@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from output import write_output
+
+
+class TestWriteOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_statuses(self):
+        self.assertEqual(write_output(self.path, lambda write: write("a")), "added")
+        self.assertEqual(
+            write_output(self.path, lambda write: write("a")), "unchanged"
+        )
+        self.assertEqual(write_output(self.path, lambda write: write("b")), "changed")
+        self.assertEqual(self.read(), "b")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_unchanged_output_keeps_mtime(self):
+        write_output(self.path, lambda write: write("same"))
+        os.utime(self.path, ns=(0, 0))
+        write_output(self.path, lambda write: write("same"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_failed_render_keeps_previous_output(self):
+        write_output(self.path, lambda write: write("old"))
+
+        def render(write):
+            write("partial")
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            write_output(self.path, render)
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_permissions(self):
+        write_output(self.path, lambda write: write("a"))
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o666 & ~umask)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import threading
+import unittest
+
+import pipeline
+import tracing
+from gencontent import read_task
+from manifest import PageStore
+from report import BuildReport
+from test_gencontent import BuildTestCase
+
+
+class TestRun(unittest.TestCase):
+    def test_results_in_order(self):
+        results = pipeline.run(
+            range(20),
+            lambda item: item * 2,
+            lambda item, value: value + 1,
+            lambda item, value: (item, value),
+            io_threads=3,
+            queue_depth=4,
+        )
+        self.assertEqual(list(results), [(i, i * 2 + 1) for i in range(20)])
+
+    def test_bounded_in_flight(self):
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def read(item):
+            with lock:
+                in_flight.append(item)
+                peak.append(len(in_flight))
+            return item
+
+        def write(item, value):
+            with lock:
+                in_flight.remove(item)
+            return value
+
+        results = pipeline.run(
+            range(100), read, lambda item, value: value, write, 2, 3
+        )
+        self.assertEqual(list(results), list(range(100)))
+        self.assertLessEqual(max(peak), 2 * 3 + 1)
+
+    def test_reads_ahead_of_processing(self):
+        started = threading.Event()
+
+        def read(item):
+            if item == 1:
+                started.set()
+            return item
+
+        def process(item, value):
+            if item == 0:
+                self.assertTrue(started.wait(5))
+            return value
+
+        results = pipeline.run(range(3), read, process, lambda item, value: value)
+        self.assertEqual(list(results), [0, 1, 2])
+
+
+class TestPipelinedBuild(BuildTestCase):
+    sources = {
+        f"blog/post{i}.md": f"# Post {i}\n\nSome **bold** and a "
+        f"[link](/blog/post{i + 1})"
+        for i in range(12)
+    }
+
+    def tearDown(self):
+        pipeline.configure()
+        tracing.disable()
+        super().tearDown()
+
+    def test_matches_unpipelined_build(self):
+        self.build(None)
+        expected = self.outputs()
+        pipeline.configure(2, 3)
+        pages = PageStore()
+        self.assertEqual(self.build(pages), [])
+        self.assertEqual(self.outputs(), expected)
+        self.assertEqual(len(pages), 12)
+
+    def test_large_sources_are_streamed(self):
+        self.write(self.source("long.md"), "# Long\n\n" + "word " * 20)
+        self.build(None)
+        expected = self.outputs()
+        pipeline.configure(2, 3)
+        max_buffered_bytes = pipeline.max_buffered_bytes
+        pipeline.max_buffered_bytes = 64
+        try:
+            long_task = (self.source("long.md"), self.template, "", "/")
+            self.assertIsNone(read_task(long_task)[0])
+            self.assertEqual(self.build(PageStore()), [])
+        finally:
+            pipeline.max_buffered_bytes = max_buffered_bytes
+        self.assertEqual(self.outputs(), expected)
+
+    def test_errors_and_stats(self):
+        bad = self.source("bad.md")
+        self.write(bad, "# Bad\n\n**unclosed")
+        self.write(self.source("untitled.md"), "no title")
+        self.build(None)
+        self.write(os.path.join(self.public, "bad.html"), "stale")
+        pipeline.configure(2, 2)
+        tracing.enable(record_events=False)
+        report = BuildReport()
+        errors = self.build(PageStore(), report)
+        self.assertEqual(
+            [from_path for from_path, _ in errors],
+            [bad, self.source("untitled.md")],
+        )
+        self.assertEqual(self.read(os.path.join(self.public, "bad.html")), "stale")
+        self.assertEqual(report.pages_rendered, 12)
+        self.assertEqual(report.counters["output.hit"], 12)
+        self.assertIn("read", report.stage_times)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import gzip
+import os
+import unittest
+import zlib
+
+from precompress import precompress_outputs
+from report import BuildReport
+from test_gencontent import TempDirTestCase
+
+
+class TestPrecompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = os.path.join(self.public, "blog", "index.html")
+        self.write(self.page, "<p>hello</p>" * 200)
+        self.write(os.path.join(self.public, "small.css"), "body {}")
+        self.write(os.path.join(self.public, "image.png"), "x" * 4096)
+
+    def test_compresses_large_text_outputs(self):
+        report = BuildReport()
+        entries = precompress_outputs(
+            self.public, None, ("gzip", "deflate"), 1024, 2, report
+        )
+        self.assertEqual(list(entries), [self.page])
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), b"<p>hello</p>" * 200)
+        with open(self.page + ".zz", "rb") as f:
+            self.assertEqual(zlib.decompress(f.read()), b"<p>hello</p>" * 200)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "small.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "image.png.gz")))
+        ratios = report.finish(self.public)["compression"][".html"]
+        self.assertEqual(ratios["gzip"]["files"], 1)
+        self.assertLess(ratios["gzip"]["ratio"], 0.1)
+
+    def test_skips_unchanged_outputs(self):
+        entries = precompress_outputs(self.public)
+        stat = os.stat(self.page + ".gz")
+        report = BuildReport()
+        precompress_outputs(self.public, entries, report=report)
+        self.assertEqual(report.counters, {"compress.hit": 1})
+        self.assertEqual(os.stat(self.page + ".gz").st_mtime_ns, stat.st_mtime_ns)
+        self.write(self.page, "<p>changed</p>" * 200)
+        report = BuildReport()
+        precompress_outputs(self.public, entries, report=report)
+        self.assertEqual(report.counters, {"compress.miss": 1})
+        self.assertEqual(
+            report.output_changes(self.public)["changed"], ["/blog/index.html.gz"]
+        )
+
+    def test_removes_stale_siblings(self):
+        entries = precompress_outputs(self.public, None, ("gzip", "deflate"))
+        entries = precompress_outputs(self.public, entries, ("gzip",))
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(self.page + ".zz"))
+        os.remove(self.page)
+        self.assertEqual(precompress_outputs(self.public, entries), {})
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
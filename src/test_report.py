@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+import tracing
+from gencontent import generate_pages_recursive
+from manifest import PageStore
+from report import BuildReport, cache_rates
+
+
+def page(source, seconds, size):
+    return {
+        "source": source,
+        "dest": source + ".html",
+        "seconds": seconds,
+        "bytes": size,
+        "stages": {"inline parsing": seconds / 2},
+        "counters": {"block.hit": 1, "block.miss": 3},
+    }
+
+
+class TestBuildReport(unittest.TestCase):
+    def test_finish(self):
+        report = BuildReport(top=1)
+        report.add_page(page("a", 0.01, 100))
+        report.add_page(page("b", 0.03, 50))
+        report.add_static(True, 0.002)
+        report.add_static(False)
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "index.html"), "w") as f:
+                f.write("12345")
+            result = report.finish(tmp)
+        self.assertEqual(result["pages_rendered"], 2)
+        self.assertEqual(result["output_bytes"], 5)
+        self.assertEqual(result["slowest_pages"][0]["source"], "b")
+        self.assertEqual(result["largest_pages"][0]["source"], "a")
+        self.assertAlmostEqual(result["stages"]["inline parsing"], 0.02)
+        self.assertAlmostEqual(result["stages"]["static copy"], 0.002)
+        self.assertEqual(result["caches"]["block"]["hit_rate"], 0.25)
+        self.assertEqual(result["caches"]["static"]["hit_rate"], 0.5)
+
+    def test_skipped_pages_carry_over(self):
+        report = BuildReport()
+        report.skip_page("a", (0.01, 100))
+        with tempfile.TemporaryDirectory() as tmp:
+            result = report.finish(tmp)
+        self.assertEqual(result["pages_total"], 1)
+        self.assertEqual(result["pages_rendered"], 0)
+        self.assertEqual(result["slowest_pages"], [])
+        self.assertEqual(
+            result["largest_pages"], [{"source": "a", "seconds": 0.01, "bytes": 100}]
+        )
+
+    def test_cache_rates(self):
+        self.assertEqual(
+            cache_rates({"x.hit": 3, "x.miss": 1, "x.evict": 2, "other": 5}),
+            {"x": {"hits": 3, "misses": 1, "evictions": 2, "hit_rate": 0.75}},
+        )
+
+    def test_regressions(self):
+        report = BuildReport()
+        report.add_page(page("a", 0.05, 100), (0.01, 100))
+        report.add_page(page("b", 0.011, 150), (0.01, 100))
+        report.add_page(page("c", 0.011, 101), (0.01, 100))
+        report.add_page(page("d", 0.05, 500))
+        with tempfile.TemporaryDirectory() as tmp:
+            result = report.finish(tmp)
+        self.assertEqual(
+            result["regressions"],
+            [
+                {"kind": "time", "source": "a", "before": 0.01, "after": 0.05},
+                {"kind": "size", "source": "b", "before": 100, "after": 150},
+            ],
+        )
+
+    def test_build_collects_page_stats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\nSome **text**")
+            tracing.enable(record_events=False)
+            try:
+                report = BuildReport()
+                out = os.path.join(tmp, "out")
+                generate_pages_recursive(
+                    content, template, out, "/", PageStore(), 1, report
+                )
+                result = report.finish(out)
+            finally:
+                tracing.disable()
+        self.assertEqual(result["pages_rendered"], 1)
+        self.assertEqual(result["largest_pages"][0]["bytes"], result["output_bytes"])
+        self.assertIn("inline parsing", result["stages"])
+        self.assertEqual(result["caches"]["incremental"]["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
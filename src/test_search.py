@@ -0,0 +1,146 @@
+import json
+import os
+import unittest
+
+import search
+from manifest import PageStore
+from search import SearchIndex, page_terms, shard_name
+from test_gencontent import BuildTestCase, TempDirTestCase
+
+
+class TestSearchTerms(unittest.TestCase):
+    def test_page_terms(self):
+        blocks = [
+            {"type": "heading", "text": "Rings of power", "level": 2},
+            {"type": "paragraph", "text": "One ring, the ring."},
+            {"type": "code", "text": ""},
+        ]
+        terms = page_terms("The Ring", blocks)
+        self.assertEqual(terms["ring"], 10 + 2)
+        self.assertEqual(terms["rings"], 3)
+        self.assertEqual(terms["the"], 11)
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("hobbit"), "ho")
+        self.assertEqual(shard_name("a"), "a")
+        self.assertEqual(shard_name("éowyn"), "_c3a96f")
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir_path = os.path.join(self.public, "search")
+        self.path = os.path.join(self.tmp.name, "search.db")
+
+    def load(self, name):
+        return json.loads(self.read(os.path.join(self.dir_path, name)))
+
+    def reopen(self, index):
+        index.save()
+        index.close()
+        return SearchIndex(self.public, "/", self.path)
+
+    def add(self, index, source, url, title, terms):
+        dest_path = os.path.join(self.public, *url.strip("/").split("/"))
+        index.add_page(source, dest_path, {"title": title, "terms": terms})
+
+    def test_delta_encoded_postings(self):
+        index = SearchIndex(self.public, "/site/")
+        self.add(index, "a.md", "/index.html", "Home", {"hobbit": 2})
+        self.add(index, "b.md", "/b.html", "B", {"elf": 1})
+        self.add(index, "c.md", "/blog/c/index.html", "C", {"hobbit": 5, "home": 1})
+        index.write(self.dir_path)
+        self.assertEqual(
+            self.load("docs.json"),
+            [["/site/", "Home"], ["/site/b.html", "B"], ["/site/blog/c/", "C"]],
+        )
+        self.assertEqual(
+            self.load("ho.json"), {"hobbit": [[0, 2], [2, 5]], "home": [[2], [1]]}
+        )
+        self.assertEqual(
+            self.load("index.json"), {"prefix_length": 2, "shards": ["el", "ho"]}
+        )
+
+    def test_incremental_update(self):
+        index = SearchIndex(self.public, "/", self.path)
+        self.add(index, "a.md", "/a.html", "A", {"hobbit": 1})
+        self.add(index, "b.md", "/b.html", "B", {"elf": 1})
+        index.write(self.dir_path)
+        elf_path = os.path.join(self.dir_path, "el.json")
+        os.utime(elf_path, ns=(0, 0))
+
+        index = self.reopen(index)
+        index.remove_page("a.md")
+        self.add(index, "c.md", "/c.html", "C", {"dwarf": 1})
+        index.write(self.dir_path)
+        self.assertEqual(
+            self.load("docs.json"), [["/c.html", "C"], ["/b.html", "B"]]
+        )
+        self.assertEqual(self.load("dw.json"), {"dwarf": [[0], [1]]})
+        self.assertFalse(os.path.exists(os.path.join(self.dir_path, "ho.json")))
+        self.assertEqual(os.stat(elf_path).st_mtime_ns, 0)
+
+    def test_compacts_ids(self):
+        index = SearchIndex(self.public, "/", self.path)
+        for name in "abcde":
+            self.add(index, f"{name}.md", f"/{name}.html", name, {name: 1})
+        index.remove_page("a.md")
+        index.write(self.dir_path)
+        self.assertEqual(self.load("docs.json")[0], None)
+        index = self.reopen(index)
+        self.assertEqual(index.next_id(), 5)
+        index.remove_page("c.md")
+        index.write(self.dir_path)
+        self.assertEqual(
+            self.load("docs.json"),
+            [["/b.html", "b"], ["/d.html", "d"], ["/e.html", "e"]],
+        )
+        self.assertEqual(index.ids(), {"b.md": 0, "d.md": 1, "e.md": 2})
+
+
+class TestSearchBuild(BuildTestCase):
+    template_text = "{{ Content }}"
+    sources = {f"{i}.md": f"# Page {i}\n\n- shire\n- river{i}" for i in range(4)}
+
+    def setUp(self):
+        super().setUp()
+        search.configure(True)
+
+    def tearDown(self):
+        search.configure()
+        super().tearDown()
+
+    def test_parallel_build_collects_documents(self):
+        serial = SearchIndex(self.public)
+        self.build(search_index=serial)
+        parallel = SearchIndex(self.public)
+        self.build(jobs=2, search_index=parallel)
+        self.assertEqual(parallel.build(), serial.build())
+        documents, shards = serial.build()
+        self.assertEqual(documents[0], ["/0.html", "Page 0"])
+        self.assertEqual(shards["sh"]["shire"], [[0, 1, 1, 1], [1, 1, 1, 1]])
+        self.assertEqual(shards["ri"]["river2"], [[2], [1]])
+
+    def test_removed_pages_leave_index(self):
+        index = SearchIndex(self.public)
+        pages = PageStore()
+        self.build(pages, search_index=index)
+        os.remove(self.source("1.md"))
+        self.build(pages, search_index=index)
+        documents, _ = index.build()
+        self.assertIsNone(documents[1])
+        self.assertEqual(documents[2], ["/2.html", "Page 2"])
+
+    def test_failed_pages_leave_index(self):
+        index = SearchIndex(self.public)
+        pages = PageStore()
+        self.build(pages, search_index=index)
+        self.write(self.source("1.md"), "no title")
+        errors = self.build(pages, search_index=index)
+        self.assertEqual(len(errors), 1)
+        self.assertIsNone(index.doc_id(self.source("1.md")))
+        self.assertIsNone(index.build()[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
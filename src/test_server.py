@@ -0,0 +1,108 @@
+import os
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+from corpus import png_bytes
+from server import SiteCache, make_handler
+from test_gencontent import BuildTestCase
+
+
+class SiteTestCase(BuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.site = SiteCache(self.content, self.static, self.template)
+        self.site.start()
+
+    def write(self, path, text):
+        super().write(path, text)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+    def body(self, url):
+        return self.site.get(url)[1].decode()
+
+
+class TestSiteCache(SiteTestCase):
+    def test_renders_pages(self):
+        self.assertIn('<h1 id="post">Post</h1>', self.body("/blog/post"))
+        self.assertIn('<h1 id="home">Home</h1>', self.body("/"))
+        self.assertEqual(self.body("/index.css"), "body {}")
+        self.assertIsNone(self.site.get("/missing"))
+
+    def test_page_change_rebuilds_only_that_page(self):
+        self.write(self.source("blog/post.md"), "# Edited")
+        self.assertEqual(self.site.refresh(), ["/blog/post.html"])
+        self.assertIn('<h1 id="edited">Edited</h1>', self.body("/blog/post.html"))
+
+    def test_template_change_rebuilds_all_pages(self):
+        self.write(self.template, "<h6>{{ Title }}</h6>")
+        self.assertEqual(self.site.refresh(), ["/blog/post.html", "/index.html"])
+        self.assertEqual(self.body("/"), "<h6>Home</h6>")
+
+    def test_added_and_removed_pages(self):
+        self.write(self.source("new.md"), "# New")
+        os.remove(self.source("blog/post.md"))
+        self.assertEqual(self.site.refresh(), ["/blog/post.html", "/new.html"])
+        self.assertIsNone(self.site.get("/blog/post.html"))
+        self.assertIn('<h1 id="new">New</h1>', self.body("/new"))
+
+    def test_no_changes(self):
+        self.assertEqual(self.site.refresh(), [])
+
+    def test_image_resize_rebuilds_pages(self):
+        image = os.path.join(self.static, "cat.png")
+        with open(image, "wb") as f:
+            f.write(png_bytes(4, 3))
+        self.write(self.source("index.md"), "# Home\n\n![cat](/cat.png)")
+        self.site.refresh()
+        self.assertIn('width="4" height="3"', self.body("/"))
+        with open(image, "wb") as f:
+            f.write(png_bytes(8, 6))
+        self.assertEqual(self.site.refresh(), ["/cat.png", "/index.html"])
+        self.assertIn('width="8" height="6"', self.body("/"))
+
+    def test_layout_change_rebuilds_pages_using_it(self):
+        layout = os.path.join(self.tmp.name, "layouts", "post.html")
+        self.write(layout, "<article>{{ Title }}</article>")
+        self.write(self.source("blog/post.md"), "---\nlayout: post\n---\n# Post")
+        self.assertEqual(self.site.refresh(), ["/blog/post.html"])
+        self.assertEqual(self.body("/blog/post"), "<article>Post</article>")
+        self.write(layout, "<main>{{ Title }}</main>")
+        self.assertEqual(self.site.refresh(), ["/blog/post.html"])
+        self.assertEqual(self.body("/blog/post"), "<main>Post</main>")
+
+    def test_drafts_are_not_served(self):
+        post = self.source("blog/post.md")
+        self.write(post, "---\ndraft: true\n---\n# Post")
+        self.assertEqual(self.site.refresh(), ["/blog/post.html"])
+        self.assertIsNone(self.site.get("/blog/post"))
+        self.write(post, "# Post")
+        self.assertEqual(self.site.refresh(), ["/blog/post.html"])
+        self.assertIn('<h1 id="post">Post</h1>', self.body("/blog/post"))
+
+
+class TestServer(SiteTestCase):
+    def test_etag_not_modified(self):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(self.site))
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{httpd.server_port}/blog/post"
+            with urllib.request.urlopen(url) as response:
+                etag = response.headers["ETag"]
+                self.assertIn(b'<h1 id="post">Post</h1>', response.read())
+            request = urllib.request.Request(url, headers={"If-None-Match": etag})
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen(request)
+            self.assertEqual(cm.exception.code, 304)
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.segments,
+            ["<title>", "Title", "</title><main>", "Content", "</main>"],
+        )
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><p>x</p>",
+        )
+
+    def test_write_streams_callables(self):
+        template = Template("<main>{{ Content }}</main>")
+        chunks = []
+        template.write(chunks.append, {"Content": lambda write: write("<p>x</p>")})
+        self.assertEqual(chunks, ["<main>", "<p>x</p>", "</main>"])
+
+    def test_render_unknown_placeholder(self):
+        template = Template("{{ Title }} {{ Unknown }}")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi {{ Unknown }}")
+
+    def test_basepath_only_rewrites_template(self):
+        template = Template('<link href="/index.css" />{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render({"Content": '<code>href="/x"</code>'}),
+            '<link href="/site/index.css" /><code>href="/x"</code>',
+        )
+
+    def test_load_template_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            self.assertIsNot(load_template(path, "/site/"), first)
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            self.assertEqual(load_template(path).render({"Title": "x"}), "<h1>x</h1>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+import tracing
+from gencontent import generate_pages_recursive
+
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        tracing.disable()
+
+    def test_disabled_records_nothing(self):
+        with tracing.span("page"):
+            pass
+        self.assertEqual(tracing.collect(), [])
+
+    def test_span_events(self):
+        tracing.enable()
+        with tracing.span("page", source="a.md"):
+            with tracing.span("read"):
+                pass
+        events = [event for event in tracing.collect() if event["ph"] == "X"]
+        self.assertEqual([event["name"] for event in events], ["read", "page"])
+        self.assertEqual(events[1]["args"], {"source": "a.md"})
+        self.assertGreaterEqual(events[0]["ts"], events[1]["ts"])
+        self.assertEqual(tracing.collect(), [])
+
+    def test_trace_parallel_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+            for i in range(4):
+                with open(os.path.join(content, f"{i}.md"), "w") as f:
+                    f.write(f"# Page {i}\n\nSome **text**\n\n- a\n- b")
+            tracing.enable()
+            out = os.path.join(tmp, "out")
+            generate_pages_recursive(content, template, out, "/", None, 2)
+            trace_path = os.path.join(tmp, "trace.json")
+            tracing.write_trace(trace_path)
+            with open(trace_path) as f:
+                events = json.load(f)["traceEvents"]
+
+        pages = [event for event in events if event["name"] == "page"]
+        self.assertEqual(len(pages), 4)
+        self.assertNotIn(os.getpid(), set(event["pid"] for event in pages))
+        names = set(event["name"] for event in events)
+        for name in [
+            "read",
+            "block split",
+            "block typing",
+            "inline parsing",
+            "tree building",
+            "serialization",
+            "template fill",
+            "flush/replace",
+        ]:
+            self.assertIn(name, names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+
+
+_tracer = None
+
+
+class Tracer:
+    def __init__(self, process_name, record_events=True):
+        self.pid = os.getpid()
+        self.record_events = record_events
+        self.events = []
+        self.stage_times = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        if record_events:
+            self.events.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "args": {"name": f"{process_name} ({self.pid})"},
+                }
+            )
+
+    def child_times(self):
+        stack = getattr(self.local, "child_times", None)
+        if stack is None:
+            stack = self.local.child_times = []
+        return stack
+
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.tracer.child_times().append(0)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter_ns()
+        tracer = self.tracer
+        duration = end - self.start
+        child_times = tracer.child_times()
+        self_time = duration - child_times.pop()
+        if child_times:
+            child_times[-1] += duration
+        with tracer.lock:
+            stage_times = tracer.stage_times
+            stage_times[self.name] = stage_times.get(self.name, 0) + self_time
+            if tracer.record_events:
+                event = {
+                    "name": self.name,
+                    "cat": "build",
+                    "ph": "X",
+                    "ts": self.start / 1000,
+                    "dur": duration / 1000,
+                    "pid": tracer.pid,
+                    "tid": threading.get_native_id(),
+                }
+                if self.args:
+                    event["args"] = self.args
+                tracer.events.append(event)
+        return False
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+null_span = NullSpan()
+
+
+def span(name, **args):
+    if _tracer is None:
+        return null_span
+    return Span(_tracer, name, args)
+
+
+def count(name, n=1):
+    if _tracer is None:
+        return
+    with _tracer.lock:
+        _tracer.counters[name] = _tracer.counters.get(name, 0) + n
+
+
+def enable(process_name="build", record_events=True):
+    global _tracer
+    _tracer = Tracer(process_name, record_events)
+
+
+def disable():
+    global _tracer
+    _tracer = None
+
+
+def settings():
+    if _tracer is None:
+        return None
+    return _tracer.record_events
+
+
+def start_worker(settings):
+    if settings is None:
+        disable()
+    else:
+        enable("worker", settings)
+
+
+def collect():
+    if _tracer is None:
+        return []
+    with _tracer.lock:
+        events = _tracer.events
+        _tracer.events = []
+    return events
+
+
+def take_stats():
+    if _tracer is None:
+        return {}, {}
+    with _tracer.lock:
+        stage_times = _tracer.stage_times
+        counters = _tracer.counters
+        _tracer.stage_times = {}
+        _tracer.counters = {}
+    return {name: ns / 1e9 for name, ns in stage_times.items()}, counters
+
+
+def add_events(events):
+    if _tracer is not None:
+        with _tracer.lock:
+            _tracer.events.extend(events)
+
+
+def write_trace(path):
+    with open(path, "w") as f:
+        json.dump({"traceEvents": collect(), "displayTimeUnit": "ms"}, f)